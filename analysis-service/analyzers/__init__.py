@@ -0,0 +1,3 @@
+# Bump whenever a change to the analyzers can change scores or feedback, so
+# cached results computed by the previous logic are no longer served.
+ANALYZER_VERSION = "8"
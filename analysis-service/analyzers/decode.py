@@ -0,0 +1,159 @@
+# decode.py
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+# OpenCV capture backend ("any", "ffmpeg", "gstreamer", ...), decoder threads
+# per video (0 lets the backend decide) and hardware-accelerated decoding.
+DECODE_BACKEND = os.getenv("ANALYSIS_DECODE_BACKEND", "any")
+DECODE_THREADS = int(os.getenv("ANALYSIS_DECODE_THREADS", 0))
+DECODE_HW_ACCELERATION = os.getenv("ANALYSIS_DECODE_HW_ACCELERATION", "0") == "1"
+
+# Frames decoded ahead of inference by a producer thread. 0 decodes on the
+# calling thread instead.
+DECODE_AHEAD = int(os.getenv("ANALYSIS_DECODE_AHEAD", 4))
+
+BACKENDS = {
+    "any": cv2.CAP_ANY,
+    "ffmpeg": cv2.CAP_FFMPEG,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "v4l2": cv2.CAP_V4L2,
+    "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION,
+}
+
+_END = object()
+
+
+def open_capture(video_path: str, backend: str = DECODE_BACKEND, threads: int = DECODE_THREADS,
+                 hw_acceleration: bool = DECODE_HW_ACCELERATION) -> cv2.VideoCapture:
+    """
+    Opens a VideoCapture with the configured backend and decoder options.
+    """
+    params = []
+    if threads:
+        params += [cv2.CAP_PROP_N_THREADS, threads]
+    if hw_acceleration:
+        params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    api = BACKENDS.get(backend.lower(), cv2.CAP_ANY)
+    if params:
+        return cv2.VideoCapture(video_path, api, params)
+    return cv2.VideoCapture(video_path, api)
+
+
+class FrameReader:
+    """
+    Decodes every `stride`-th frame of an opened capture straight into RGB,
+    resized to `size` (width, height) when given.
+
+    Iterating yields (frame_index, timestamp_ms, rgb_frame). With `ahead` > 0
+    a producer thread decodes up to that many frames ahead into a ring of
+    reusable buffers while the caller runs inference; a yielded frame stays
+    valid until the next one is requested. Frames are retrieved, resized and
+    converted into buffers that are allocated on first use and then reused,
+    so steady-state decoding allocates nothing.
+
+    `max_frames` raises `too_long(frame_index)` once decoding passes that
+    frame. `timings` accumulates the seconds spent decoding and converting.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, stride: int = 1, size: tuple = None, ahead: int = DECODE_AHEAD,
+                 max_frames: int = None, too_long=None):
+        self.cap = cap
+        self.stride = max(stride, 1)
+        self.size = size
+        self.ahead = max(ahead, 0)
+        self.max_frames = max_frames
+        self.too_long = too_long
+        self.timings = {"decode": 0.0, "color_convert": 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+        self._free = None
+
+    def _frames(self, buffers: list, slots):
+        """
+        Decodes sampled frames into `buffers[slot]` for each slot taken from
+        `slots`, yielding (slot, frame_index, timestamp_ms).
+        """
+        source_fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        raw, scaled = None, None
+        frame_index = -1
+        while not self._stop.is_set():
+            clock = time.perf_counter()
+            if not self.cap.grab():
+                return
+            frame_index += 1
+            if self.max_frames is not None and frame_index >= self.max_frames:
+                raise self.too_long(frame_index)
+            if frame_index % self.stride:
+                self.timings["decode"] += time.perf_counter() - clock
+                continue
+            ret, raw = self.cap.retrieve(raw)
+            if not ret:
+                return
+            frame = raw
+            if self.size is not None:
+                frame = scaled = cv2.resize(raw, self.size, dst=scaled, interpolation=cv2.INTER_AREA)
+            timestamp_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            if timestamp_ms <= 0 and frame_index and source_fps:
+                # Some backends report no timestamps; derive it from the frame index.
+                timestamp_ms = frame_index * 1000.0 / source_fps
+            self.timings["decode"] += time.perf_counter() - clock
+
+            slot = next(slots, None)
+            if slot is None:
+                return
+            clock = time.perf_counter()
+            buffers[slot] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffers[slot])
+            self.timings["color_convert"] += time.perf_counter() - clock
+            yield slot, frame_index, timestamp_ms
+
+    def __iter__(self):
+        if not self.ahead:
+            buffers = [None]
+            for slot, frame_index, timestamp_ms in self._frames(buffers, iter(lambda: 0, None)):
+                yield frame_index, timestamp_ms, buffers[slot]
+            return
+
+        buffers = [None] * (self.ahead + 1)
+        self._free = queue.Queue()
+        for slot in range(len(buffers)):
+            self._free.put(slot)
+        filled = queue.Queue()
+
+        def produce():
+            try:
+                for item in self._frames(buffers, iter(self._free.get, None)):
+                    filled.put(item)
+                filled.put(_END)
+            except Exception as e:
+                filled.put(e)
+
+        self._thread = threading.Thread(target=produce, name="frame-reader", daemon=True)
+        self._thread.start()
+        in_use = None
+        while True:
+            if in_use is not None:
+                self._free.put(in_use)
+            item = filled.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            in_use, frame_index, timestamp_ms = item
+            yield frame_index, timestamp_ms, buffers[in_use]
+
+    def release(self):
+        """
+        Stops the producer thread (if any) and closes the capture.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._free.put(None)  # unblocks a producer waiting for a free buffer
+            self._thread.join()
+            self._thread = None
+        self.cap.release()
@@ -1,75 +1,72 @@
-import cv2
-import mediapipe as mp
+from analyzers.feedback import FeedbackEvents
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
 
-def count_high_knees(video_path: str) -> dict:
-    """
-    Counts high knees and provides deep feedback.
-    """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {"raw_score": 0, "feedback": ["Could not open video."], "report": {}}
+ANALYSIS_FPS = ANALYZERS['Endurance Run'].fps
+MAX_RESOLUTION = ANALYZERS['Endurance Run'].max_resolution
 
-    counter, incomplete_reps = 0, 0
-    left_leg_state, right_leg_state = "down", "down"
-    mistakes, strengths, tips = [], [], []
+LEG_LANDMARKS = [Landmark.LEFT_HIP, Landmark.LEFT_KNEE, Landmark.RIGHT_HIP, Landmark.RIGHT_KNEE]
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
 
-        try:
-            landmarks = results.pose_landmarks.landmark
-            left_hip_y = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y
-            left_knee_y = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y
-            right_hip_y = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y
-            right_knee_y = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y
+class HighKneeCounter(FrameConsumer):
+    """
+    High-knee state machine tracking each leg's knee against its hip.
+    """
+
+    def __init__(self):
+        self.counter, self.incomplete_reps = 0, 0
+        self.left_leg_state, self.right_leg_state = "down", "down"
+        self.events = FeedbackEvents()
 
+    def update(self, chunk):
+        detected = chunk.detected
+        legs = chunk.landmarks[detected][:, LEG_LANDMARKS, 1]
+        for (left_hip_y, left_knee_y, right_hip_y, right_knee_y), t_ms in zip(
+                legs.tolist(), chunk.timestamps_ms[detected].tolist()):
             # Left leg logic
-            if left_knee_y < left_hip_y and left_leg_state == "down":
-                left_leg_state = "up"
-                counter += 1
-                if "Good knee lift" not in strengths:
-                    strengths.append("Knees lifted high above hip level")
+            if left_knee_y < left_hip_y and self.left_leg_state == "down":
+                self.left_leg_state = "up"
+                self.counter += 1
+                self.events.strength("Knees lifted high above hip level", t_ms)
             elif left_knee_y > left_hip_y:
-                if left_leg_state == "up" and left_knee_y < left_hip_y * 1.1:
-                    incomplete_reps += 1
-                    mistakes.append("Left knee not raised high enough")
-                    tips.append("Lift left knee above hip height for full rep")
-                left_leg_state = "down"
+                if self.left_leg_state == "up" and left_knee_y < left_hip_y * 1.1:
+                    self.incomplete_reps += 1
+                    self.events.mistake("Left knee not raised high enough", t_ms)
+                    self.events.tip("Lift left knee above hip height for full rep", t_ms)
+                self.left_leg_state = "down"
 
             # Right leg logic
-            if right_knee_y < right_hip_y and right_leg_state == "down":
-                right_leg_state = "up"
-                counter += 1
-                if "Good rhythm" not in strengths:
-                    strengths.append("Consistent alternating knee lifts")
+            if right_knee_y < right_hip_y and self.right_leg_state == "down":
+                self.right_leg_state = "up"
+                self.counter += 1
+                self.events.strength("Consistent alternating knee lifts", t_ms)
             elif right_knee_y > right_hip_y:
-                if right_leg_state == "up" and right_knee_y < right_hip_y * 1.1:
-                    incomplete_reps += 1
-                    mistakes.append("Right knee not raised high enough")
-                    tips.append("Lift right knee above hip height for full rep")
-                right_leg_state = "down"
+                if self.right_leg_state == "up" and right_knee_y < right_hip_y * 1.1:
+                    self.incomplete_reps += 1
+                    self.events.mistake("Right knee not raised high enough", t_ms)
+                    self.events.tip("Lift right knee above hip height for full rep", t_ms)
+                self.right_leg_state = "down"
+
+    def result(self) -> dict:
+        counter, incomplete_reps = self.counter, self.incomplete_reps
+        fields, feedback = self.events.report()
+        report = {
+            "total_reps": counter,
+            "incomplete_reps": incomplete_reps,
+            **fields,
+            "analysis_summary": f"Performed {counter} high knees with {incomplete_reps} incomplete reps."
+        }
 
-        except:
-            pass
+        return {"raw_score": counter, "feedback": feedback, "report": report}
 
-    cap.release()
-    pose.close()
 
-    report = {
-        "total_reps": counter,
-        "incomplete_reps": incomplete_reps,
-        "mistakes": mistakes,
-        "strengths": strengths,
-        "tips": tips,
-        "analysis_summary": f"Performed {counter} high knees with {incomplete_reps} incomplete reps."
-    }
-    feedback = strengths + mistakes + tips
+def count_high_knees(video_path: str, **options) -> dict:
+    """
+    Counts high knees and provides deep feedback.
+    """
+    from analyzers.engine import run_consumer
 
-    return {"raw_score": counter, "feedback": feedback, "report": report}
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, HighKneeCounter(), **options)
@@ -0,0 +1,411 @@
+# engine.py
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+from analyzers.decode import DECODE_AHEAD, FrameReader, open_capture
+from analyzers.errors import VideoTooLong
+from analyzers.pose_pool import pose_pool
+from analyzers.track import CHUNK_SIZE, LANDMARK_DIMS, NUM_LANDMARKS, FrameConsumer, PoseTrack, replay_track
+
+# Motion gating: a frame whose downscaled grayscale image differs from the
+# last inferred frame in fewer than MOTION_THRESHOLD of its pixels (by more
+# than MOTION_PIXEL_DELTA levels) reuses that frame's landmarks instead of
+# running pose inference. Off (0) by default: MediaPipe's smoothing sees fewer
+# frames, which moves rep counts and jump heights on real clips. 0.002 is a
+# reasonable value where throughput matters more than exact parity.
+MOTION_THRESHOLD = float(os.getenv("ANALYSIS_MOTION_THRESHOLD", 0))
+MOTION_PIXEL_DELTA = 12
+MOTION_GATE_WIDTH = 96
+# Inference is forced at least this often, even on a static scene.
+MOTION_MAX_REUSE = 30
+
+# ROI mode: after the first detection, inference runs on the athlete's
+# bounding box (padded by ROI_PADDING of its longer side) instead of the whole
+# frame, if that box covers at most ROI_MAX_FRACTION of the frame. Off by
+# default: it only pays off on inputs much larger than the athlete.
+ROI_CROP = os.getenv("ANALYSIS_ROI_CROP", "0") == "1"
+ROI_PADDING = 0.5
+ROI_MAX_FRACTION = 0.6
+ROI_MIN_SIZE = 96
+
+
+def _landmark_row(results) -> np.ndarray:
+    """
+    Flattens a MediaPipe result into a (33, 4) array, or None when no pose was found.
+    """
+    if not results.pose_landmarks:
+        return None
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+                    dtype=np.float32)
+
+
+def _frame_stride(source_fps: float, target_fps: float) -> int:
+    """
+    Number of decoded frames per analyzed frame for the requested analysis rate.
+    """
+    if not target_fps or not source_fps or source_fps <= target_fps:
+        return 1
+    return max(1, int(round(source_fps / target_fps)))
+
+
+class MotionGate:
+    """
+    Frame-differencing pre-filter that decides whether a frame can reuse the
+    landmarks of the last frame that went through pose inference.
+
+    Frames are compared with that last inferred frame rather than with their
+    predecessor, so slow movement still adds up and triggers inference.
+    """
+
+    def __init__(self, threshold: float = MOTION_THRESHOLD, pixel_delta: int = MOTION_PIXEL_DELTA,
+                 width: int = MOTION_GATE_WIDTH, max_reuse: int = MOTION_MAX_REUSE):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.max_reuse = max_reuse
+        self.keyframe = None
+        self.reused = 0
+
+    def is_static(self, frame: np.ndarray) -> bool:
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        thumb = cv2.cvtColor(cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA),
+                             cv2.COLOR_RGB2GRAY)
+        if self.keyframe is not None and self.reused < self.max_reuse:
+            changed = np.count_nonzero(cv2.absdiff(thumb, self.keyframe) > self.pixel_delta)
+            if changed < self.threshold * thumb.size:
+                self.reused += 1
+                return True
+        self.keyframe, self.reused = thumb, 0
+        return False
+
+
+class RoiTracker:
+    """
+    Picks the region of the frame to run pose inference on: a padded box
+    around the athlete's first detection, or None for the full frame.
+
+    MediaPipe tracks and smooths landmarks in the coordinates of the image it
+    is given, so a crop that moved with the athlete would corrupt that state.
+    The box is therefore fixed once chosen. If the athlete gets close to its
+    edge or is lost, ROI mode ends and the rest of the video uses the full
+    frame. `changed` is set on the frames where the region switches, so the
+    caller can reset the estimator.
+    """
+
+    def __init__(self, padding: float = ROI_PADDING, max_fraction: float = ROI_MAX_FRACTION):
+        self.padding = padding
+        self.max_fraction = max_fraction
+        self.box = None  # (x0, y0, x1, y1) in pixels
+        self.active = True
+        self.changed = False
+
+    def update(self, row: np.ndarray, frame_shape: tuple):
+        self.changed = False
+        if not self.active:
+            return
+        height, width = frame_shape[:2]
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            margin_x, margin_y = (x1 - x0) * 0.05 / width, (y1 - y0) * 0.05 / height
+            inside = row is not None and (
+                row[:, 0].min() >= x0 / width + margin_x and row[:, 0].max() <= x1 / width - margin_x
+                and row[:, 1].min() >= y0 / height + margin_y and row[:, 1].max() <= y1 / height - margin_y
+            )
+            if not inside:
+                self.box, self.active, self.changed = None, False, True
+            return
+
+        if row is None:
+            return
+        xs = np.clip(row[:, 0], 0, 1) * width
+        ys = np.clip(row[:, 1], 0, 1) * height
+        x0, y0, x1, y1 = xs.min(), ys.min(), xs.max(), ys.max()
+        pad = self.padding * max(x1 - x0, y1 - y0, ROI_MIN_SIZE)
+        box = (max(0, int(x0 - pad)), max(0, int(y0 - pad)),
+               min(width, int(np.ceil(x1 + pad))), min(height, int(np.ceil(y1 + pad))))
+        if (box[2] - box[0]) * (box[3] - box[1]) > self.max_fraction * width * height:
+            self.active = False  # the athlete fills the frame; cropping would not help
+            return
+        self.box, self.changed = box, True
+
+
+def _infer(pose, frame: np.ndarray, box: tuple, timings: dict) -> np.ndarray:
+    """
+    Runs pose inference on an RGB `frame`, or only on its `box` region, and returns the
+    landmark row in full-frame coordinates (None when nobody was found).
+    """
+    image = frame if box is None else frame[box[1]:box[3], box[0]:box[2]]  # a view, not a copy
+    clock = time.perf_counter()
+    row = _landmark_row(pose.process(image))
+    timings["inference"] += time.perf_counter() - clock
+    if row is not None and box is not None:
+        height, width = frame.shape[:2]
+        crop_width, crop_height = box[2] - box[0], box[3] - box[1]
+        row[:, 0] = (box[0] + row[:, 0] * crop_width) / width
+        row[:, 1] = (box[1] + row[:, 1] * crop_height) / height
+        row[:, 2] *= crop_width / width  # z shares x's scale
+    return row
+
+
+class SegmentConsumer(FrameConsumer):
+    """
+    Feeds a wrapped consumer only the frames between `start_s` and `end_s`
+    seconds of the video (either bound may be None), so several tests can
+    share one pass over a clip that records them one after another.
+    """
+
+    def __init__(self, consumer, start_s: float = None, end_s: float = None):
+        self.consumer = consumer
+        self.start_ms = start_s * 1000 if start_s is not None else None
+        self.end_ms = end_s * 1000 if end_s is not None else None
+
+    def update(self, chunk):
+        keep = np.ones(len(chunk), dtype=bool)
+        if self.start_ms is not None:
+            keep &= chunk.timestamps_ms >= self.start_ms
+        if self.end_ms is not None:
+            keep &= chunk.timestamps_ms < self.end_ms
+            if len(chunk) and chunk.timestamps_ms[-1] >= self.end_ms:
+                self.done = True
+        if keep.any():
+            selected = PoseTrack(chunk.landmarks[keep], chunk.timestamps_ms[keep], chunk.fps, chunk.width, chunk.height)
+            self.consumer.update(selected)
+        self.done = self.done or self.consumer.done
+
+    def result(self) -> dict:
+        return self.consumer.result()
+
+
+def process_video(video_path: str, consumers=(), target_fps: float = None, max_resolution: int = None,
+                  on_track=None, max_duration_s: float = None, on_progress=None,
+                  stats: dict = None, frame_budget: int = None, time_budget_s: float = None,
+                  motion_threshold: float = MOTION_THRESHOLD, roi_crop: bool = ROI_CROP,
+                  decode_ahead: int = DECODE_AHEAD, model_complexity: int = 1, **capture_options) -> PoseTrack:
+    """
+    Decodes the video once, runs pose inference on the sampled frames and
+    streams the landmarks to each consumer in chunks of CHUNK_SIZE frames.
+
+    `target_fps` analyzes only about that many frames per second; skipped
+    frames are grabbed but never converted. `max_resolution` downscales frames
+    whose short side exceeds it (480 means 480p, portrait or landscape) before
+    inference; landmarks are normalized, so the consumers are unaffected.
+    Both default to analyzing every full frame.
+
+    Frames are decoded by a FrameReader, `decode_ahead` frames ahead on a
+    producer thread (0 decodes inline); `capture_options` (backend, threads,
+    hw_acceleration) go to decode.open_capture.
+
+    Sampled frames with next to no motion since the last inferred frame (see
+    MotionGate; `motion_threshold=0` turns it off) reuse its landmarks and
+    skip inference entirely.
+
+    With `roi_crop` (see RoiTracker) inference only sees a fixed region around
+    the athlete once they have been found, and landmarks are mapped back to
+    full-frame coordinates. When the athlete leaves that region the frame is
+    retried on the full image, which is used from then on.
+
+    `model_complexity` picks the MediaPipe Pose model (0 lite, 1 full, 2 heavy).
+
+    `on_track`, if given, is called with the finished PoseTrack (e.g. to
+    persist it for later re-scoring).
+
+    `on_progress(frames_decoded, total_frames)` is called after every chunk.
+
+    `max_duration_s` rejects longer videos with VideoTooLong, judged from the
+    container metadata before the first frame is decoded (and enforced while
+    decoding when the metadata has no frame count).
+
+    Decoding stops early once every consumer reports `done`. It is also cut
+    short after `frame_budget` analyzed frames or `time_budget_s` seconds of
+    wall-clock time; the consumers then only see the frames decoded so far,
+    the returned track has `truncated` set and `on_track` is not called.
+
+    `stats`, if given, is filled with the seconds spent per stage ("open",
+    "decode", "color_convert", "decode_wait", "motion_gate", "inference",
+    "state_machine" as `<stage>_seconds`) plus "frames_processed", "frames_without_pose",
+    "frames_reused", "motion_skip_ratio", "frames_cropped", "roi_fallbacks"
+    and "stop_reason" ("done", "frame_budget", "time_budget" or None).
+
+    Returns the full PoseTrack, or None when the video cannot be opened.
+    """
+    timings = dict.fromkeys(("open", "decode_wait", "motion_gate", "inference", "state_machine"), 0.0)
+    started = clock = time.perf_counter()
+    cap = open_capture(video_path, **capture_options)
+    timings["open"] = time.perf_counter() - clock
+    if not cap.isOpened():
+        return None
+
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    stride = _frame_stride(source_fps, target_fps)
+
+    max_frames = None
+    if max_duration_s and source_fps:
+        max_frames = int(max_duration_s * source_fps)
+        if frame_count > max_frames:
+            cap.release()
+            raise VideoTooLong(f"Video is {frame_count / source_fps:.0f}s long; the limit is {max_duration_s:.0f}s.")
+
+    inference_size = None
+    if max_resolution and min(width, height) > max_resolution:
+        scale = max_resolution / min(width, height)
+        inference_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    # The container's frame count is only a hint, so the buffers grow if needed.
+    capacity = max(frame_count // stride + 1, CHUNK_SIZE)
+    landmarks = np.full((capacity, NUM_LANDMARKS, LANDMARK_DIMS), np.nan, dtype=np.float32)
+    timestamps = np.zeros(capacity, dtype=np.float64)
+    track = PoseTrack(landmarks, timestamps, source_fps / stride, width, height)
+
+    frame_index, n_frames, fed, missed, reused = -1, 0, 0, 0, 0
+    stop_reason = None
+    gate = MotionGate(motion_threshold) if motion_threshold else None
+    roi = RoiTracker() if roi_crop else None
+    cropped, fallbacks = 0, 0
+    row = None
+    reader = FrameReader(cap, stride, inference_size, decode_ahead, max_frames,
+                         too_long=lambda _: VideoTooLong(f"Video is longer than the {max_duration_s:.0f}s limit."))
+    pose = pose_pool.checkout(model_complexity=model_complexity)
+    frames = iter(reader)
+    try:
+        while True:
+            clock = time.perf_counter()
+            if frame_budget and n_frames >= frame_budget:
+                stop_reason = "frame_budget"
+                break
+            if time_budget_s and clock - started >= time_budget_s:
+                stop_reason = "time_budget"
+                break
+            try:
+                frame_index, timestamp_ms, frame = next(frames)
+            except StopIteration:
+                break
+            timings["decode_wait"] += time.perf_counter() - clock
+
+            if n_frames == len(track.landmarks):
+                extra = np.full_like(track.landmarks, np.nan)
+                track.landmarks = np.concatenate([track.landmarks, extra])
+                track.timestamps_ms = np.concatenate([track.timestamps_ms, np.zeros(len(extra))])
+
+            clock = time.perf_counter()
+            static = gate is not None and gate.is_static(frame)
+            timings["motion_gate"] += time.perf_counter() - clock
+
+            if static:
+                reused += 1  # `row` still holds the last inferred landmarks
+            else:
+                box = roi.box if roi is not None else None
+                row = _infer(pose, frame, box, timings)
+                if roi is not None:
+                    roi.update(row, frame.shape)
+                    if roi.changed:
+                        pose_pool.reset(pose)
+                if box is not None:
+                    cropped += 1
+                    if roi.box is None:
+                        # Lost in the crop: redo this frame on the full image.
+                        fallbacks += 1
+                        row = _infer(pose, frame, None, timings)
+            if row is not None:
+                track.landmarks[n_frames] = row
+            else:
+                missed += 1
+            track.timestamps_ms[n_frames] = timestamp_ms
+            n_frames += 1
+
+            if n_frames - fed == CHUNK_SIZE:
+                clock = time.perf_counter()
+                for consumer in consumers:
+                    consumer.update(track.slice(fed, n_frames))
+                timings["state_machine"] += time.perf_counter() - clock
+                fed = n_frames
+                if on_progress is not None:
+                    on_progress(frame_index + 1, max(frame_count, frame_index + 1))
+                if consumers and all(consumer.done for consumer in consumers):
+                    stop_reason = "done"
+                    break
+    finally:
+        reader.release()
+        pose_pool.checkin(pose)
+    timings.update(reader.timings)
+
+    if fed < n_frames:
+        clock = time.perf_counter()
+        for consumer in consumers:
+            consumer.update(track.slice(fed, n_frames))
+        timings["state_machine"] += time.perf_counter() - clock
+
+    if stats is not None:
+        stats.update({f"{stage}_seconds": round(seconds, 6) for stage, seconds in timings.items()})
+        stats["frames_processed"] = n_frames
+        stats["frames_without_pose"] = missed
+        stats["frames_reused"] = reused
+        stats["motion_skip_ratio"] = round(reused / n_frames, 4) if n_frames else 0.0
+        stats["frames_cropped"] = cropped
+        stats["roi_fallbacks"] = fallbacks
+        stats["stop_reason"] = stop_reason
+
+    if on_progress is not None:
+        on_progress(frame_index + 1, frame_index + 1)
+
+    track = track.slice(0, n_frames)
+    if stop_reason in ("frame_budget", "time_budget"):
+        track.truncated = stop_reason
+    elif on_track is not None:
+        on_track(track)
+    return track
+
+
+def mark_truncated(result: dict, track: PoseTrack) -> dict:
+    """
+    Flags a result computed from a budget-truncated track as partial in its
+    report (added if missing), which is where the service's cache looks.
+    """
+    analyzed = float(track.timestamps_ms[-1]) / 1000 if len(track) else 0.0
+    note = {"reason": track.truncated, "frames": len(track), "analyzed_seconds": round(analyzed, 2)}
+    if not isinstance(result.get("report"), dict):
+        result["report"] = {}
+    result["report"]["truncated"] = note
+    return result
+
+
+def unreadable_result() -> dict:
+    """
+    The analyzers' response for a video that could not be opened, or that
+    opened but yielded no frames. report["unreadable"] tells the service not
+    to cache it: the next attempt may well succeed.
+    """
+    return {"raw_score": 0, "feedback": ["Could not open video."], "report": {"unreadable": True}}
+
+
+def run_consumer(video_path: str, consumer, track: PoseTrack = None, **options) -> dict:
+    """
+    Scores a single video with one consumer, keeping the analyzers' response
+    shape for unreadable files (see unreadable_result).
+
+    Every analyzer entry point (situps.count_situps, sprint.analyze_sprint, ...)
+    fills in its preferred target_fps / max_resolution and passes its keyword
+    options on to here unchanged. Passing a stored `track` re-scores it
+    without touching the video; other `options` (sampling overrides, budgets,
+    stats, on_track, on_progress, ...) go to process_video.
+
+    The analyzer modules import this function inside their entry points, so
+    their consumers can be used without OpenCV or MediaPipe installed.
+    """
+    if track is not None:
+        replay_track(track, [consumer])
+    else:
+        track = process_video(video_path, [consumer], **options)
+        if track is None or not (len(track) or track.truncated):
+            return unreadable_result()
+    result = consumer.result()
+    if track.truncated:
+        mark_truncated(result, track)
+    return result
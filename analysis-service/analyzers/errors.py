@@ -0,0 +1,9 @@
+# errors.py
+# Kept free of heavy imports so the API process can catch these without
+# loading OpenCV / MediaPipe.
+
+
+class VideoTooLong(Exception):
+    """
+    Raised before decoding when a video is longer than the allowed duration.
+    """
@@ -0,0 +1,86 @@
+# feedback.py
+
+STRENGTH = "strength"
+MISTAKE = "mistake"
+TIP = "tip"
+
+# Distinct messages kept per consumer. Analyzers only emit a handful of fixed
+# messages; anything beyond this is counted under OVERFLOW_MESSAGE instead.
+MAX_EVENT_TYPES = 32
+OVERFLOW_MESSAGE = "Other feedback"
+
+
+class FeedbackEvents:
+    """
+    Bounded aggregation of the feedback a state machine emits while scoring.
+
+    Every (kind, message) pair is stored once with how often it fired and
+    the timestamps of its first and last occurrence, so memory and payload
+    size stay constant however long the video is and however often a
+    condition repeats. Messages keep the order they were first seen in.
+    """
+
+    def __init__(self, max_types: int = MAX_EVENT_TYPES):
+        self.max_types = max_types
+        self._events = {}  # (kind, message) -> [count, first_ms, last_ms]
+
+    def add(self, kind: str, message: str, timestamp_ms: float = None):
+        key = (kind, message)
+        event = self._events.get(key)
+        if event is None:
+            if len(self._events) >= self.max_types:
+                key = (kind, OVERFLOW_MESSAGE)
+                event = self._events.get(key)
+            if event is None:
+                event = self._events[key] = [0, timestamp_ms, timestamp_ms]
+        event[0] += 1
+        if timestamp_ms is not None:
+            if event[1] is None:
+                event[1] = timestamp_ms
+            event[2] = timestamp_ms
+
+    def strength(self, message: str, timestamp_ms: float = None):
+        self.add(STRENGTH, message, timestamp_ms)
+
+    def mistake(self, message: str, timestamp_ms: float = None):
+        self.add(MISTAKE, message, timestamp_ms)
+
+    def tip(self, message: str, timestamp_ms: float = None):
+        self.add(TIP, message, timestamp_ms)
+
+    def count(self, kind: str, message: str = None) -> int:
+        """
+        How often `message` (or any message of `kind`) fired.
+        """
+        return sum(event[0] for (k, m), event in self._events.items()
+                   if k == kind and (message is None or m == message))
+
+    def messages(self, kind: str) -> list:
+        """
+        The distinct messages of one kind, in the order they first fired.
+        """
+        return [message for (k, message) in self._events if k == kind]
+
+    def summary(self) -> list:
+        """
+        One entry per distinct message with its count and first / last timestamp.
+        """
+        return [
+            {
+                "kind": kind,
+                "message": message,
+                "count": count,
+                "firstMs": round(first_ms, 1) if first_ms is not None else None,
+                "lastMs": round(last_ms, 1) if last_ms is not None else None,
+            }
+            for (kind, message), (count, first_ms, last_ms) in self._events.items()
+        ]
+
+    def report(self) -> tuple:
+        """
+        Returns the "mistakes" / "strengths" / "tips" / "events" report fields
+        and the flat feedback list the analyzers return.
+        """
+        strengths, mistakes, tips = self.messages(STRENGTH), self.messages(MISTAKE), self.messages(TIP)
+        fields = {"mistakes": mistakes, "strengths": strengths, "tips": tips, "events": self.summary()}
+        return fields, strengths + mistakes + tips
@@ -0,0 +1,164 @@
+# live.py
+
+import time
+
+import cv2
+import numpy as np
+
+from analyzers.engine import MOTION_THRESHOLD, MotionGate, _infer
+from analyzers.pose_pool import pose_pool
+from analyzers.track import LANDMARK_DIMS, NUM_LANDMARKS, PoseTrack
+
+# Frames are handed to the state machine in small chunks so running counts
+# follow the athlete within a fraction of a second.
+LIVE_CHUNK_SIZE = 8
+
+
+class LiveAnalysis:
+    """
+    Incremental counterpart of engine.process_video for frames that arrive
+    one at a time while the athlete is still being recorded.
+
+    Frames (BGR images, e.g. decoded JPEGs) go through the same sampling,
+    motion gating and pose inference as a video, and the landmarks are fed
+    to `consumer` in chunks of LIVE_CHUNK_SIZE frames. Only the current chunk
+    is kept, so memory does not grow with the length of the session.
+
+    A session holds one pose estimator from the pool until `close()`.
+    """
+
+    def __init__(self, consumer, target_fps: float = None, max_resolution: int = None,
+                 motion_threshold: float = MOTION_THRESHOLD, chunk_size: int = LIVE_CHUNK_SIZE):
+        self.consumer = consumer
+        self.min_interval_ms = 1000.0 / target_fps if target_fps else 0.0
+        self.max_resolution = max_resolution
+        self.gate = MotionGate(motion_threshold) if motion_threshold else None
+        self.chunk_size = max(chunk_size, 1)
+        self.landmarks = np.full((self.chunk_size, NUM_LANDMARKS, LANDMARK_DIMS), np.nan, dtype=np.float32)
+        self.timestamps = np.zeros(self.chunk_size, dtype=np.float64)
+        self.pending = 0
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_without_pose = 0
+        self.frames_reused = 0
+        self.timings = {"inference": 0.0, "state_machine": 0.0}
+        self.last_ms = None
+        self.size = (0, 0)
+        self._row = None
+        self._pose = pose_pool.checkout()
+
+    @property
+    def done(self) -> bool:
+        return self.consumer.done
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        self.size = (width, height)
+        if self.max_resolution and min(width, height) > self.max_resolution:
+            scale = self.max_resolution / min(width, height)
+            frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def _wanted(self, timestamp_ms: float) -> bool:
+        self.frames_received += 1
+        if self.last_ms is not None and timestamp_ms - self.last_ms < self.min_interval_ms:
+            return False
+        self.last_ms = timestamp_ms
+        return True
+
+    def add_encoded(self, data: bytes, timestamp_ms: float) -> bool:
+        """
+        Like `add_frame` for an encoded image (JPEG, PNG, WebP). Frames that
+        sampling drops are never decoded. Raises ValueError for undecodable data.
+        """
+        if not self._wanted(timestamp_ms):
+            return False
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Frame is not a decodable image.")
+        return self._analyze(frame, timestamp_ms)
+
+    def add_frame(self, frame: np.ndarray, timestamp_ms: float) -> bool:
+        """
+        Analyzes one BGR frame captured at `timestamp_ms`. Frames closer than
+        the target frame interval to the last analyzed one are dropped.
+        Returns True when the frame completed a chunk and the consumer was updated.
+        """
+        if not self._wanted(timestamp_ms):
+            return False
+        return self._analyze(frame, timestamp_ms)
+
+    def _analyze(self, frame: np.ndarray, timestamp_ms: float) -> bool:
+        rgb = self._prepare(frame)
+        if self.gate is not None and self.gate.is_static(rgb):
+            self.frames_reused += 1  # `_row` still holds the last inferred landmarks
+        else:
+            self._row = _infer(self._pose, rgb, None, self.timings)
+        if self._row is not None:
+            self.landmarks[self.pending] = self._row
+        else:
+            self.landmarks[self.pending] = np.nan
+            self.frames_without_pose += 1
+        self.timestamps[self.pending] = timestamp_ms
+        self.pending += 1
+        self.frames_processed += 1
+
+        if self.pending == self.chunk_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """
+        Feeds the frames analyzed since the last chunk to the consumer.
+        """
+        if not self.pending:
+            return
+        clock = time.perf_counter()
+        width, height = self.size
+        chunk = PoseTrack(self.landmarks[:self.pending].copy(), self.timestamps[:self.pending].copy(),
+                          0.0, width, height)
+        self.consumer.update(chunk)
+        self.timings["state_machine"] += time.perf_counter() - clock
+        self.pending = 0
+
+    def snapshot(self) -> dict:
+        """
+        The running score and frame counts, e.g. to show while recording.
+        """
+        return {
+            "rawScore": self.consumer.result().get("raw_score", 0),
+            "framesReceived": self.frames_received,
+            "framesProcessed": self.frames_processed,
+            "done": self.done,
+        }
+
+    def stats(self) -> dict:
+        """
+        Stage timings and frame counts in the shape process_video reports them.
+        """
+        stats = {f"{stage}_seconds": round(seconds, 6) for stage, seconds in self.timings.items()}
+        stats.update({
+            "frames_processed": self.frames_processed,
+            "frames_without_pose": self.frames_without_pose,
+            "frames_reused": self.frames_reused,
+            "motion_skip_ratio": round(self.frames_reused / self.frames_processed, 4) if self.frames_processed else 0.0,
+            "stop_reason": "done" if self.done else None,
+        })
+        return stats
+
+    def finish(self) -> dict:
+        """
+        Flushes the last partial chunk and returns the consumer's result.
+        """
+        self.flush()
+        return self.consumer.result()
+
+    def close(self):
+        """
+        Returns the pose estimator to the pool. Safe to call more than once.
+        """
+        if self._pose is not None:
+            pose_pool.checkin(self._pose)
+            self._pose = None
@@ -0,0 +1,120 @@
+# pose_pool.py
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import mediapipe as mp
+
+mp_pose = mp.solutions.pose
+
+# Settings every analyzer used when it still built its own estimator.
+DEFAULT_POSE_SETTINGS = {
+    "model_complexity": 1,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+# A tiny empty frame: running it through an estimator finds no person, which
+# drops the tracked ROI and the landmark smoothing state of the previous video.
+_FLUSH_FRAME = np.zeros((64, 64, 3), dtype=np.uint8)
+
+
+class PosePool:
+    """
+    Keeps constructed MediaPipe Pose estimators around between videos.
+
+    Estimators are keyed by (model_complexity, min_detection_confidence,
+    min_tracking_confidence). A checked-out estimator is used by exactly one
+    video at a time, and it is flushed on check-in so the next video always
+    starts from a fresh detection instead of the previous athlete's track.
+    """
+
+    def __init__(self):
+        self._idle = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_complexity, min_detection_confidence, min_tracking_confidence) -> tuple:
+        return (int(model_complexity), float(min_detection_confidence), float(min_tracking_confidence))
+
+    def checkout(self, model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """
+        Returns an idle estimator for the given settings, constructing one only
+        when none is available.
+        """
+        key = self._key(model_complexity, min_detection_confidence, min_tracking_confidence)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                pose = idle.pop()
+                self._keys[id(pose)] = key
+                return pose
+
+        pose = mp_pose.Pose(
+            model_complexity=key[0],
+            min_detection_confidence=key[1],
+            min_tracking_confidence=key[2],
+        )
+        with self._lock:
+            self._keys[id(pose)] = key
+        return pose
+
+    @staticmethod
+    def reset(pose):
+        """
+        Drops an estimator's tracked ROI and landmark smoothing state, so the
+        next frame starts from a fresh detection.
+        """
+        pose.process(_FLUSH_FRAME)
+
+    def checkin(self, pose):
+        """
+        Hands an estimator back to the pool after resetting its tracking state.
+        """
+        with self._lock:
+            key = self._keys.pop(id(pose), None)
+        if key is None:
+            pose.close()
+            return
+        try:
+            self.reset(pose)
+        except Exception:
+            # A broken graph is not worth keeping around.
+            pose.close()
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append(pose)
+
+    @contextmanager
+    def estimator(self, **settings):
+        """
+        Context-managed checkout: `with pose_pool.estimator() as pose: ...`
+        """
+        pose = self.checkout(**settings)
+        try:
+            yield pose
+        finally:
+            self.checkin(pose)
+
+    def warm_up(self, settings_list=None, per_key: int = 1):
+        """
+        Builds estimators ahead of time and runs one dummy inference through
+        each, so neither model loading nor graph start-up lands on a request.
+        """
+        for settings in settings_list or [DEFAULT_POSE_SETTINGS]:
+            poses = [self.checkout(**settings) for _ in range(per_key)]
+            for pose in poses:
+                self.checkin(pose)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for poses in idle.values():
+            for pose in poses:
+                pose.close()
+
+
+# One pool per process; analysis workers each warm their own copy.
+pose_pool = PosePool()
@@ -0,0 +1,213 @@
+# proxy.py
+
+import os
+import subprocess
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: an open file cannot be removed there anyway
+    fcntl = None
+
+from analyzers.errors import VideoTooLong
+
+# Normalized analysis proxies: every upload is transcoded once into a
+# constant-frame-rate, upright, H.264 copy no larger than PROXY_MAX_RESOLUTION
+# (short side) and PROXY_MAX_FPS, cached by content hash. Analyzers decode the
+# proxy instead of the phone's original, so decode cost no longer depends on
+# the codec, resolution or rotation the athlete's phone used. Off by default:
+# the first analysis of every upload pays for the transcode, and the re-encode
+# can move scores slightly compared to the original.
+PROXY_ENABLED = os.getenv("ANALYSIS_PROXY", "0") == "1"
+PROXY_DIR = os.getenv("ANALYSIS_PROXY_DIR", "proxy_cache")
+PROXY_MAX_BYTES = int(os.getenv("ANALYSIS_PROXY_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+PROXY_MAX_RESOLUTION = int(os.getenv("ANALYSIS_PROXY_MAX_RESOLUTION", 720))
+PROXY_MAX_FPS = float(os.getenv("ANALYSIS_PROXY_MAX_FPS", 60))
+PROXY_THREADS = int(os.getenv("ANALYSIS_PROXY_THREADS", 2))
+PROXY_CRF = int(os.getenv("ANALYSIS_PROXY_CRF", 18))
+
+# Frame rate used when the container does not report one.
+FALLBACK_FPS = 30.0
+
+# Part of every proxy's file name; change it when the transcode settings
+# change so proxies made with the old settings are not reused.
+PROXY_VERSION = f"v1-{PROXY_MAX_RESOLUTION}p{PROXY_MAX_FPS:g}-crf{PROXY_CRF}"
+
+
+class ProxyUnavailable(Exception):
+    """
+    Raised when no proxy can be made (no ffmpeg, or the transcode failed).
+    """
+
+
+def _imageio_ffmpeg():
+    try:
+        import imageio_ffmpeg
+    except ImportError:
+        raise ProxyUnavailable("imageio-ffmpeg is not installed")
+    return imageio_ffmpeg
+
+
+def _ffmpeg() -> str:
+    try:
+        return _imageio_ffmpeg().get_ffmpeg_exe()
+    except RuntimeError as e:
+        raise ProxyUnavailable(str(e))
+
+
+def probe(video_path: str) -> dict:
+    """
+    Container metadata as reported by ffmpeg: fps, size (after rotation),
+    rotate and duration.
+    """
+    frames = _imageio_ffmpeg().read_frames(video_path)
+    try:
+        return next(frames)
+    except (RuntimeError, OSError, StopIteration) as e:
+        raise ProxyUnavailable(f"cannot read video metadata: {e}")
+    finally:
+        frames.close()
+
+
+def proxy_path(content_hash: str, directory: str = PROXY_DIR) -> str:
+    return os.path.join(directory, f"{content_hash}-{PROXY_VERSION}.mp4")
+
+
+def _lease(path: str):
+    """
+    Opens the proxy at `path` for reading and holds a shared lock on it, so
+    `_evict` leaves it alone until the handle is closed. Returns None when
+    there is no such proxy (or it was evicted while being opened).
+    """
+    try:
+        handle = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_SH)
+        try:
+            current = os.path.samestat(os.fstat(handle.fileno()), os.stat(path))
+        except FileNotFoundError:
+            current = False
+        if not current:
+            handle.close()
+            return None
+    return handle
+
+
+def _remove_unused(path: str) -> bool:
+    """
+    Deletes a proxy unless some analysis holds a lease on it.
+    """
+    try:
+        if fcntl is None:
+            os.remove(path)
+            return True
+        with open(path, "rb") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            os.remove(path)
+            return True
+    except FileNotFoundError:
+        return False
+    except PermissionError:
+        return False  # held open on Windows
+
+
+def _evict(directory: str, max_bytes: int):
+    """
+    Removes the least recently used proxies until the directory fits in
+    `max_bytes`, skipping proxies that are being decoded.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".mp4"):
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if _remove_unused(os.path.join(directory, name)):
+            total -= size
+
+
+def transcode(video_path: str, output_path: str, fps: float):
+    """
+    Writes the normalized proxy of `video_path` to `output_path`: `fps`
+    constant frame rate, rotation applied to the pixels (ffmpeg autorotates),
+    short side at most PROXY_MAX_RESOLUTION, no audio.
+    """
+    limit = PROXY_MAX_RESOLUTION
+    scale = (f"scale=w='if(lt(iw,ih),min({limit},iw),-2)':h='if(lt(iw,ih),-2,min({limit},ih))'"
+             f":flags=area")
+    command = [
+        _ffmpeg(), "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", video_path,
+        "-an", "-sn", "-dn",
+        "-vf", f"fps={fps:.3f},{scale}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", str(PROXY_CRF), "-pix_fmt", "yuv420p",
+        "-threads", str(PROXY_THREADS),
+        "-f", "mp4", output_path,
+    ]
+    completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if completed.returncode != 0:
+        raise ProxyUnavailable(completed.stderr.decode("utf-8", "replace").strip()[-500:] or "ffmpeg failed")
+
+
+def ensure_proxy(video_path: str, content_hash: str, max_duration_s: float = None,
+                 directory: str = PROXY_DIR, stats: dict = None, create: bool = True):
+    """
+    Returns an open handle on the cached proxy for a video, transcoding it
+    first if there is none. The handle's `name` is the path to decode; keep
+    it open until decoding is finished, since proxies held open are never
+    evicted. `max_duration_s` rejects longer videos with VideoTooLong before
+    any transcoding work is done. With `create` False a missing proxy is not
+    made and None is returned instead.
+
+    `stats`, if given, gets "proxy" ("hit", "created" or "skipped") and,
+    unless skipped, "proxy_seconds". Raises ProxyUnavailable when no proxy can be made;
+    callers then decode the original.
+    """
+    start = time.perf_counter()
+    path = proxy_path(content_hash, directory)
+    handle = _lease(path)
+    if handle is not None:
+        os.utime(path)  # keeps it most recently used
+        outcome = "hit"
+    elif not create:
+        outcome = "skipped"
+    else:
+        meta = probe(video_path)
+        duration = meta.get("duration") or 0
+        if max_duration_s and duration > max_duration_s:
+            raise VideoTooLong(f"Video is {duration:.0f}s long; the limit is {max_duration_s:.0f}s.")
+        fps = min(meta.get("fps") or FALLBACK_FPS, PROXY_MAX_FPS)
+
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(prefix="proxy_", suffix=".part", dir=directory)
+        os.close(fd)
+        try:
+            transcode(video_path, partial, fps)
+            os.replace(partial, path)  # atomic, so a concurrent reader never sees half a file
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        handle = _lease(path)
+        if handle is None:
+            raise ProxyUnavailable("proxy was evicted before it could be opened")
+        _evict(directory, PROXY_MAX_BYTES)
+        outcome = "created"
+
+    if stats is not None:
+        stats["proxy"] = outcome
+        if handle is not None:
+            stats["proxy_seconds"] = round(time.perf_counter() - start, 6)
+    return handle
@@ -1,72 +1,63 @@
-import cv2
-import mediapipe as mp
-from analyzers.utils import calculate_angle
+import math
+from analyzers.feedback import FeedbackEvents
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
+from analyzers.utils import joint_angles
 
 
-def count_pushups(video_path: str) -> dict:
-    """
-    Counts push-up repetitions and provides detailed feedback.
-    """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+ANALYSIS_FPS = ANALYZERS['Push-ups'].fps
+MAX_RESOLUTION = ANALYZERS['Push-ups'].max_resolution
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {"raw_score": 0, "feedback": ["Could not open video."], "report": {}}
 
-    counter, stage = 0, None
-    mistakes, strengths, tips = [], [], []
+class PushupCounter(FrameConsumer):
+    """
+    Push-up state machine driven by the shoulder-elbow-wrist angle.
+    """
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
-        try:
-            landmarks = results.pose_landmarks.landmark
-            shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-            wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
+    def __init__(self):
+        self.counter, self.stage = 0, None
+        self.events = FeedbackEvents()
 
-            angle = calculate_angle(shoulder, elbow, wrist)
+    def update(self, chunk):
+        angles = joint_angles(chunk.landmarks, Landmark.LEFT_SHOULDER, Landmark.LEFT_ELBOW, Landmark.LEFT_WRIST)
+        for angle, t_ms in zip(angles.tolist(), chunk.timestamps_ms.tolist()):
+            if math.isnan(angle):
+                continue
 
             if angle > 160:
-                stage = "up"
-                if "Full arm extension" not in strengths:
-                    strengths.append("Full arm extension at the top of push-ups")
-            if angle < 90 and stage == 'up':
-                stage = "down"
-                counter += 1
-                if "Reaching full depth" not in strengths:
-                    strengths.append("Reaching proper depth during push-ups")
-            elif angle < 120 and stage == 'up':
-                if "Shallow push-ups" not in mistakes:
-                    mistakes.append("Not lowering chest enough")
-                    tips.append("Lower chest until elbows reach ~90° angle")
-            elif angle > 140 and stage == 'down':
-                if "Incomplete extension" not in mistakes:
-                    mistakes.append("Not extending arms fully")
-                    tips.append("Lock arms at the top for full range")
-
-        except:
-            pass
-
-    cap.release()
-    pose.close()
-
-    report = {
-        "total_reps": counter,
-        "mistakes": mistakes,
-        "strengths": strengths,
-        "tips": tips,
-        "analysis_summary": f"You performed {counter} push-ups. "
-                            f"Strengths: {', '.join(strengths)}. "
-                            f"Mistakes: {', '.join(mistakes)}."
-    }
-    feedback = strengths + mistakes + tips
+                self.stage = "up"
+                self.events.strength("Full arm extension at the top of push-ups", t_ms)
+            if angle < 90 and self.stage == 'up':
+                self.stage = "down"
+                self.counter += 1
+                self.events.strength("Reaching proper depth during push-ups", t_ms)
+            elif angle < 120 and self.stage == 'up':
+                self.events.mistake("Not lowering chest enough", t_ms)
+                self.events.tip("Lower chest until elbows reach ~90° angle", t_ms)
+            elif angle > 140 and self.stage == 'down':
+                self.events.mistake("Not extending arms fully", t_ms)
+                self.events.tip("Lock arms at the top for full range", t_ms)
+
+    def result(self) -> dict:
+        counter = self.counter
+        fields, feedback = self.events.report()
+        report = {
+            "total_reps": counter,
+            **fields,
+            "analysis_summary": f"You performed {counter} push-ups. "
+                                f"Strengths: {', '.join(fields['strengths'])}. "
+                                f"Mistakes: {', '.join(fields['mistakes'])}."
+        }
+
+        return {"raw_score": counter, "feedback": feedback, "report": report}
+
+
+def count_pushups(video_path: str, **options) -> dict:
+    """
+    Counts push-up repetitions and provides detailed feedback.
+    """
+    from analyzers.engine import run_consumer
 
-    return {"raw_score": counter, "feedback": feedback, "report": report}
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, PushupCounter(), **options)
@@ -0,0 +1,176 @@
+# registry.py
+
+import ast
+import importlib
+import importlib.util
+import threading
+import time
+from collections import namedtuple
+
+# Everything the service needs to know about a test, declared in one place.
+#
+#   module, entry_point, consumer  where the analyzer lives; modules are only
+#                                  imported on first use
+#   metric, unit                   what the raw score measures
+#   bounds                         (worst, best) raw scores, mapped to 1 and 10
+#                                  points by scoring.scale_score
+#   required                       request parameters the analyzer needs, passed
+#                                  positionally in this order
+#   fps, max_resolution            preferred sampling (None = every frame / full size)
+#   cost                           "short" or "long" clips; long ones queue behind
+#                                  short ones in the job scheduler
+AnalyzerSpec = namedtuple(
+    "AnalyzerSpec",
+    "module entry_point consumer metric unit bounds required fps max_resolution cost",
+)
+
+COST_SHORT = "short"
+COST_LONG = "long"
+
+# Request parameters an analyzer may require, with the name clients know them by.
+PARAMETERS = {"athlete_height_cm": "Athlete height"}
+
+ANALYZERS = {
+    # The jump peak lasts only a few frames, so every frame is analyzed.
+    'Vertical Jump': AnalyzerSpec(
+        module="analyzers.vertical_jump", entry_point="calculate_height", consumer="JumpHeightTracker",
+        metric="jump_height", unit="cm", bounds=(0.0, 100.0), required=("athlete_height_cm",),
+        fps=None, max_resolution=720, cost=COST_SHORT,
+    ),
+    # Sit-ups and push-ups take about a second each, so 15 fps still samples
+    # every rep many times.
+    'Sit-ups': AnalyzerSpec(
+        module="analyzers.situps", entry_point="count_situps", consumer="SitupCounter",
+        metric="repetitions", unit="reps", bounds=(0.0, 50.0), required=(),
+        fps=15, max_resolution=480, cost=COST_SHORT,
+    ),
+    'Push-ups': AnalyzerSpec(
+        module="analyzers.pushups", entry_point="count_pushups", consumer="PushupCounter",
+        metric="repetitions", unit="reps", bounds=(0.0, 50.0), required=(),
+        fps=15, max_resolution=480, cost=COST_SHORT,
+    ),
+    # A knee lift lasts a few hundred milliseconds; 15 fps catches each one several times.
+    'Endurance Run': AnalyzerSpec(
+        module="analyzers.endurance", entry_point="count_high_knees", consumer="HighKneeCounter",
+        metric="high_knees", unit="reps", bounds=(0.0, 150.0), required=(),
+        fps=15, max_resolution=480, cost=COST_LONG,
+    ),
+    # Center-line crossings are slow compared to the frame rate.
+    'Shuttle Run': AnalyzerSpec(
+        module="analyzers.shuttle_run", entry_point="count_laps", consumer="ShuttleLapCounter",
+        metric="laps", unit="laps", bounds=(0.0, 20.0), required=(),
+        fps=15, max_resolution=480, cost=COST_LONG,
+    ),
+    # Crossings are interpolated between frame timestamps, so the timing does not
+    # depend on decode speed; every frame is still analyzed for the best precision.
+    # Lower is better: bounds run from a slow to a fast run.
+    'Sprint': AnalyzerSpec(
+        module="analyzers.sprint", entry_point="analyze_sprint", consumer="SprintTimer",
+        metric="sprint_time", unit="s", bounds=(12.0, 4.0), required=(),
+        fps=None, max_resolution=720, cost=COST_SHORT,
+    ),
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+# Seconds this process has spent importing analyzer modules.
+import_seconds = 0.0
+
+
+def spec(test_type: str) -> AnalyzerSpec:
+    try:
+        return ANALYZERS[test_type]
+    except KeyError:
+        raise ValueError(f"Invalid test type: {test_type}")
+
+
+def load(test_type: str):
+    """
+    Returns the analyzer module for a test type, importing it on first use.
+    """
+    global import_seconds
+
+    name = spec(test_type).module
+    module = _loaded.get(name)
+    if module is None:
+        with _lock:
+            module = _loaded.get(name)
+            if module is None:
+                start = time.perf_counter()
+                module = _loaded[name] = importlib.import_module(name)
+                import_seconds += time.perf_counter() - start
+    return module
+
+
+def load_all():
+    for test_type in ANALYZERS:
+        load(test_type)
+
+
+def _top_level_names(module: str) -> set:
+    """
+    Functions and classes a module defines, read from its source without importing it.
+    """
+    found = importlib.util.find_spec(module)
+    if found is None or not found.origin:
+        raise ValueError(f"module {module} not found")
+    with open(found.origin, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=found.origin)
+    return {node.name for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))}
+
+
+def validate():
+    """
+    Checks every entry at service start: the module exists and defines the
+    entry point and consumer, and the metadata is well-formed. The analyzer
+    sources are parsed rather than imported, so this keeps startup cheap.
+    Raises ValueError listing every problem found.
+    """
+    problems = []
+    for test_type, analyzer in ANALYZERS.items():
+        try:
+            names = _top_level_names(analyzer.module)
+        except (ValueError, OSError, SyntaxError) as e:
+            problems.append(f"{test_type}: {e}")
+            continue
+        for attribute in (analyzer.entry_point, analyzer.consumer):
+            if attribute not in names:
+                problems.append(f"{test_type}: {analyzer.module} does not define {attribute}")
+        worst, best = analyzer.bounds
+        if worst == best:
+            problems.append(f"{test_type}: empty score bounds {analyzer.bounds}")
+        for param in analyzer.required:
+            if param not in PARAMETERS:
+                problems.append(f"{test_type}: unknown required parameter {param}")
+        if analyzer.fps is not None and analyzer.fps <= 0:
+            problems.append(f"{test_type}: fps must be positive or None")
+        if analyzer.max_resolution is not None and analyzer.max_resolution <= 0:
+            problems.append(f"{test_type}: max_resolution must be positive or None")
+        if analyzer.cost not in (COST_SHORT, COST_LONG):
+            problems.append(f"{test_type}: unknown cost class {analyzer.cost}")
+    if problems:
+        raise ValueError("Invalid analyzer registry: " + "; ".join(problems))
+
+
+def _arguments(analyzer: AnalyzerSpec, params: dict) -> tuple:
+    return tuple(params.get(name) for name in analyzer.required)
+
+
+def entry_point(test_type: str, athlete_height_cm: float = None):
+    """
+    The analyzer function for a test type plus the extra positional arguments it takes.
+    """
+    analyzer = spec(test_type)
+    args = _arguments(analyzer, {"athlete_height_cm": athlete_height_cm})
+    return getattr(load(test_type), analyzer.entry_point), args
+
+
+def consumer(test_type: str, athlete_height_cm: float = None):
+    """
+    A fresh state machine for a test type plus its registry entry.
+    """
+    analyzer = spec(test_type)
+    args = _arguments(analyzer, {"athlete_height_cm": athlete_height_cm})
+    return getattr(load(test_type), analyzer.consumer)(*args), analyzer
@@ -1,58 +1,69 @@
-import cv2
-import mediapipe as mp
+from analyzers.feedback import FeedbackEvents
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
 
-def count_laps(video_path: str) -> dict:
+
+ANALYSIS_FPS = ANALYZERS['Shuttle Run'].fps
+MAX_RESOLUTION = ANALYZERS['Shuttle Run'].max_resolution
+
+# Once laps have been run, this long without a detected athlete means they
+# have left the frame for good and the count can no longer change.
+EXIT_TIMEOUT_SECONDS = 5.0
+
+
+class ShuttleLapCounter(FrameConsumer):
+    """
+    Counts a lap each time the athlete's nose crosses the vertical center line.
+    """
+
+    def __init__(self):
+        self.laps, self.position_state = 0, None
+        self.last_seen_ms = None
+        self.events = FeedbackEvents()
+
+    def update(self, chunk):
+        # Landmarks are normalized, so the center line is at 0.5 at any resolution.
+        center_line_x = 0.5
+        detected = chunk.detected
+        nose_xs = chunk.landmarks[detected][:, Landmark.NOSE, 0]
+        for nose_x, t_ms in zip(nose_xs.tolist(), chunk.timestamps_ms[detected].tolist()):
+
+            if self.position_state is None:
+                self.position_state = "left" if nose_x < center_line_x else "right"
+
+            if nose_x < center_line_x and self.position_state == "right":
+                self.laps += 1
+                self.position_state = "left"
+                self.events.strength("Quick turnaround to left side", t_ms)
+            elif nose_x > center_line_x and self.position_state == "left":
+                self.laps += 1
+                self.position_state = "right"
+                self.events.strength("Quick turnaround to right side", t_ms)
+
+        if detected.any():
+            self.last_seen_ms = float(chunk.timestamps_ms[detected][-1])
+        if self.laps and len(chunk) and self.last_seen_ms is not None:
+            if chunk.timestamps_ms[-1] - self.last_seen_ms >= EXIT_TIMEOUT_SECONDS * 1000:
+                self.done = True
+
+    def result(self) -> dict:
+        laps = self.laps
+        fields, feedback = self.events.report()
+        report = {
+            "laps": laps,
+            **fields,
+            "analysis_summary": f"Completed {laps} laps with shuttle run feedback."
+        }
+
+        return {"raw_score": laps, "feedback": feedback, "report": report}
+
+
+def count_laps(video_path: str, **options) -> dict:
     """
     Counts shuttle run laps with deep feedback.
     """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {"raw_score": 0, "feedback": ["Could not open video."], "report": {}}
-
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    center_line_x = frame_width / 2
-    laps, position_state = 0, None
-    mistakes, strengths, tips = [], [], []
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
-
-        try:
-            landmarks = results.pose_landmarks.landmark
-            nose_x = landmarks[mp_pose.PoseLandmark.NOSE.value].x * frame_width
-
-            if position_state is None:
-                position_state = "left" if nose_x < center_line_x else "right"
-
-            if nose_x < center_line_x and position_state == "right":
-                laps += 1
-                position_state = "left"
-                strengths.append("Quick turnaround to left side")
-            elif nose_x > center_line_x and position_state == "left":
-                laps += 1
-                position_state = "right"
-                strengths.append("Quick turnaround to right side")
-
-        except:
-            pass
-
-    cap.release()
-    pose.close()
-
-    report = {
-        "laps": laps,
-        "mistakes": mistakes,
-        "strengths": strengths,
-        "tips": tips,
-        "analysis_summary": f"Completed {laps} laps with shuttle run feedback."
-    }
-    feedback = strengths + mistakes + tips
-
-    return {"raw_score": laps, "feedback": feedback, "report": report}
+    from analyzers.engine import run_consumer
+
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, ShuttleLapCounter(), **options)
@@ -1,64 +1,57 @@
-import cv2
-import mediapipe as mp
-from analyzers.utils import calculate_angle
+import math
+from analyzers.feedback import FeedbackEvents
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
+from analyzers.utils import joint_angles
 
 
-def count_situps(video_path: str) -> dict:
-    """
-    Counts sit-ups with deep feedback.
-    """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+ANALYSIS_FPS = ANALYZERS['Sit-ups'].fps
+MAX_RESOLUTION = ANALYZERS['Sit-ups'].max_resolution
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {"raw_score": 0, "feedback": ["Could not open video."], "report": {}}
 
-    counter, stage = 0, None
-    mistakes, strengths, tips = [], [], []
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
+class SitupCounter(FrameConsumer):
+    """
+    Sit-up state machine driven by the shoulder-hip-knee angle.
+    """
 
-        try:
-            landmarks = results.pose_landmarks.landmark
-            shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                   landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-            knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                    landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
+    def __init__(self):
+        self.counter, self.stage = 0, None
+        self.events = FeedbackEvents()
 
-            angle = calculate_angle(shoulder, hip, knee)
+    def update(self, chunk):
+        angles = joint_angles(chunk.landmarks, Landmark.LEFT_SHOULDER, Landmark.LEFT_HIP, Landmark.LEFT_KNEE)
+        for angle, t_ms in zip(angles.tolist(), chunk.timestamps_ms.tolist()):
+            if math.isnan(angle):
+                continue
 
             if angle > 160:
-                stage = "down"
-            if angle < 90 and stage == 'down':
-                stage = "up"
-                counter += 1
-                strengths.append("Good sit-up form with full range")
-            elif angle > 120 and stage == 'up':
-                if "Partial sit-ups" not in mistakes:
-                    mistakes.append("Not sitting up high enough")
-                    tips.append("Bring chest closer to knees")
-
-        except:
-            pass
-
-    cap.release()
-    pose.close()
-
-    report = {
-        "total_reps": counter,
-        "mistakes": mistakes,
-        "strengths": strengths,
-        "tips": tips,
-        "analysis_summary": f"Completed {counter} sit-ups with feedback provided."
-    }
-    feedback = strengths + mistakes + tips
+                self.stage = "down"
+            if angle < 90 and self.stage == 'down':
+                self.stage = "up"
+                self.counter += 1
+                self.events.strength("Good sit-up form with full range", t_ms)
+            elif angle > 120 and self.stage == 'up':
+                self.events.mistake("Not sitting up high enough", t_ms)
+                self.events.tip("Bring chest closer to knees", t_ms)
+
+    def result(self) -> dict:
+        counter = self.counter
+        fields, feedback = self.events.report()
+        report = {
+            "total_reps": counter,
+            **fields,
+            "analysis_summary": f"Completed {counter} sit-ups with feedback provided."
+        }
+
+        return {"raw_score": counter, "feedback": feedback, "report": report}
+
+
+def count_situps(video_path: str, **options) -> dict:
+    """
+    Counts sit-ups with deep feedback.
+    """
+    from analyzers.engine import run_consumer
 
-    return {"raw_score": counter, "feedback": feedback, "report": report}
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, SitupCounter(), **options)
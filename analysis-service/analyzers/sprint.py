@@ -1,65 +1,115 @@
-import cv2
-import mediapipe as mp
-import time
 import json
 import sys
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
 
-def analyze_sprint(video_path):
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose()
-    cap = cv2.VideoCapture(video_path)
-    
-    if not cap.isOpened():
-        return {"error": f"Could not open video file: {video_path}"}
-    
-    # Fixed calibration lines
-    start_line_x = 100
-    finish_line_x = 1200
-    
-    current_state = "READY"
-    start_time = 0
-    final_time = 0
-    
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-        
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image_rgb)
-        
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            h, w, _ = frame.shape
-            
-            right_shoulder_x = int(landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER].x * w)
-            
-            if current_state == "READY" and right_shoulder_x > start_line_x:
-                current_state = "RUNNING"
-                start_time = time.time()
-            
-            elif current_state == "RUNNING" and right_shoulder_x > finish_line_x:
-                final_time = time.time() - start_time
-                current_state = "FINISHED"
-    
-    cap.release()
-    pose.close()
-
-    if final_time == 0:
-        status = "INCOMPLETE"
-        result_str = "N/A"
-    else:
-        status = "SUCCESS"
-        result_str = f"{final_time:.2f} s"
-
-    return {
-        "testType": "Sprint",
-        "result": result_str,
-        "score_seconds": round(final_time, 2),
-        "status": status,
-        "cheatDetected": False,
-        "anomalies": ["Incomplete run"] if status == "INCOMPLETE" else []
-    }
+
+ANALYSIS_FPS = ANALYZERS['Sprint'].fps
+MAX_RESOLUTION = ANALYZERS['Sprint'].max_resolution
+
+# Calibration lines as fractions of the frame width (100 px and 1200 px of
+# the original 1280 px wide setup), so any resolution times the same run.
+START_LINE_X = 0.078125
+FINISH_LINE_X = 0.9375
+
+
+class SprintTimer(FrameConsumer):
+    """
+    Times the run between a start and a finish line crossed by the right shoulder.
+
+    Lines are normalized x positions. Times come from the frames' presentation
+    timestamps, with each crossing interpolated between the last frame before
+    the line and the first one past it.
+    """
+
+    def __init__(self, start_line_x: float = START_LINE_X, finish_line_x: float = FINISH_LINE_X):
+        self.start_line_x = start_line_x
+        self.finish_line_x = finish_line_x
+
+        self.current_state = "READY"
+        self.start_time = 0
+        self.final_time = 0
+        self.previous = None  # (x, timestamp_ms) of the last detected frame
+
+    def _crossing_ms(self, line_x: float, x: float, t_ms: float) -> float:
+        if self.previous is None:
+            return t_ms
+        prev_x, prev_t = self.previous
+        if x == prev_x:
+            return t_ms
+        fraction = min(max((line_x - prev_x) / (x - prev_x), 0.0), 1.0)
+        return prev_t + fraction * (t_ms - prev_t)
+
+    def update(self, chunk):
+        detected = chunk.detected
+        shoulder_xs = chunk.landmarks[detected][:, Landmark.RIGHT_SHOULDER, 0]
+        timestamps = chunk.timestamps_ms[detected]
+        for right_shoulder_x, t_ms in zip(shoulder_xs.tolist(), timestamps.tolist()):
+
+            if self.current_state == "READY" and right_shoulder_x > self.start_line_x:
+                self.current_state = "RUNNING"
+                self.start_time = self._crossing_ms(self.start_line_x, right_shoulder_x, t_ms)
+
+            elif self.current_state == "RUNNING" and right_shoulder_x > self.finish_line_x:
+                finish_time = self._crossing_ms(self.finish_line_x, right_shoulder_x, t_ms)
+                self.final_time = (finish_time - self.start_time) / 1000
+                self.current_state = "FINISHED"
+                self.done = True
+                break
+
+            self.previous = (right_shoulder_x, t_ms)
+
+    def result(self) -> dict:
+        final_time = self.final_time
+        if final_time == 0:
+            status = "INCOMPLETE"
+            result_str = "N/A"
+        else:
+            status = "SUCCESS"
+            result_str = f"{final_time:.2f} s"
+
+        anomalies = ["Incomplete run"] if status == "INCOMPLETE" else []
+        if status == "SUCCESS":
+            strengths, tips = [f"Sprint time: {result_str}"], []
+        else:
+            strengths, tips = [], ["Keep the start and finish lines and the whole run in frame."]
+        report = {
+            "sprint_time_s": round(final_time, 2),
+            "result": result_str,
+            "status": status,
+            "cheatDetected": False,
+            "anomalies": anomalies,
+            "mistakes": anomalies,
+            "strengths": strengths,
+            "tips": tips,
+            "analysis_summary": f"Sprint {status.lower()}: {result_str}.",
+        }
+
+        return {
+            "testType": "Sprint",
+            "result": result_str,
+            "raw_score": round(final_time, 2),
+            "score_seconds": round(final_time, 2),
+            "status": status,
+            "cheatDetected": False,
+            "anomalies": anomalies,
+            "feedback": strengths + anomalies + tips,
+            "report": report,
+        }
+
+
+def analyze_sprint(video_path, track=None, start_line_x: float = START_LINE_X,
+                   finish_line_x: float = FINISH_LINE_X, **options):
+    """
+    Times a sprint between the start and finish lines, given as normalized
+    x positions in the frame. A stored `track` is replayed instead of
+    decoding `video_path`.
+    """
+    from analyzers.engine import run_consumer
+
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, SprintTimer(start_line_x, finish_line_x), track=track, **options)
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -67,4 +117,4 @@ if __name__ == "__main__":
         result = analyze_sprint(video_path)
         print(json.dumps(result))
     else:
-        print(json.dumps({"error": "No video path provided."}))
\ No newline at end of file
+        print(json.dumps({"error": "No video path provided."}))
@@ -0,0 +1,125 @@
+# track.py
+
+from enum import IntEnum
+
+import numpy as np
+
+# x, y, z and visibility for each of the 33 BlazePose landmarks.
+NUM_LANDMARKS = 33
+LANDMARK_DIMS = 4
+
+# Frames handed to the consumers per update() call.
+CHUNK_SIZE = 32
+
+
+class Landmark(IntEnum):
+    """
+    BlazePose landmark indices (same numbering as mp.solutions.pose.PoseLandmark),
+    kept here so the state machines can run without importing MediaPipe.
+    """
+    NOSE = 0
+    LEFT_EYE_INNER = 1
+    LEFT_EYE = 2
+    LEFT_EYE_OUTER = 3
+    RIGHT_EYE_INNER = 4
+    RIGHT_EYE = 5
+    RIGHT_EYE_OUTER = 6
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    MOUTH_LEFT = 9
+    MOUTH_RIGHT = 10
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_PINKY = 17
+    RIGHT_PINKY = 18
+    LEFT_INDEX = 19
+    RIGHT_INDEX = 20
+    LEFT_THUMB = 21
+    RIGHT_THUMB = 22
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+    LEFT_HEEL = 29
+    RIGHT_HEEL = 30
+    LEFT_FOOT_INDEX = 31
+    RIGHT_FOOT_INDEX = 32
+
+
+class PoseTrack:
+    """
+    Compact per-frame pose data for (part of) a video.
+
+    `landmarks` has shape (N, 33, 4) holding normalized x, y, z and visibility;
+    rows are NaN for frames where no person was detected. `timestamps_ms`
+    holds the presentation time of every frame. `truncated` names the budget
+    ("frame_budget" or "time_budget") that cut decoding short, if any.
+    """
+
+    def __init__(self, landmarks: np.ndarray, timestamps_ms: np.ndarray,
+                 fps: float = 0.0, width: int = 0, height: int = 0):
+        self.landmarks = landmarks
+        self.timestamps_ms = timestamps_ms
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.truncated = None
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    @property
+    def detected(self) -> np.ndarray:
+        """
+        Boolean mask of the frames that have landmarks.
+        """
+        return ~np.isnan(self.landmarks[:, 0, 0])
+
+    def slice(self, start: int, stop: int) -> "PoseTrack":
+        """
+        Returns a view over frames [start, stop) sharing this track's memory.
+        """
+        return PoseTrack(self.landmarks[start:stop], self.timestamps_ms[start:stop],
+                         self.fps, self.width, self.height)
+
+
+class FrameConsumer:
+    """
+    Base class for the per-test state machines driven by the pose engine.
+
+    The engine calls `update()` with consecutive chunks of a PoseTrack as the
+    video is decoded, then `result()` once the stream has ended. Consumers keep
+    all of their state between calls, so one instance scores one video.
+
+    A consumer sets `done` once no further frame can change its result; the
+    engine stops decoding when every consumer of a video is done.
+    """
+    done = False
+
+    def update(self, chunk: PoseTrack) -> None:
+        raise NotImplementedError
+
+    def result(self) -> dict:
+        raise NotImplementedError
+
+
+def replay_track(track: PoseTrack, consumers=()) -> PoseTrack:
+    """
+    Feeds an already extracted (e.g. stored) track to the consumers in the
+    same chunks engine.process_video would, without decoding or inference.
+    """
+    for start in range(0, len(track), CHUNK_SIZE):
+        chunk = track.slice(start, start + CHUNK_SIZE)
+        # Stored tracks may be float16 and memory-mapped; compute in float32.
+        chunk.landmarks = np.asarray(chunk.landmarks, dtype=np.float32)
+        for consumer in consumers:
+            consumer.update(chunk)
+        if consumers and all(consumer.done for consumer in consumers):
+            break
+    return track
@@ -0,0 +1,97 @@
+# track_store.py
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from analyzers.track import LANDMARK_DIMS, NUM_LANDMARKS, PoseTrack
+
+# File layout (little endian):
+#   header   magic, format version, landmark dtype, frame count, landmarks per
+#            frame, values per landmark, fps, width, height, metadata length
+#   metadata UTF-8 JSON (test type, athlete height, sampling, ...)
+#   padding  up to the next 64-byte boundary
+#   float64  timestamps_ms[n_frames]
+#   float16/32 landmarks[n_frames, n_landmarks, dims]
+# Both arrays start on an aligned offset so the file can be memory-mapped.
+MAGIC = b"PTRK"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIHHfIII")
+_ALIGN = 64
+_DTYPES = {0: np.float16, 1: np.float32}
+
+# Where /analyze keeps the landmark tracks of analyzed videos ("" disables it).
+TRACK_STORE_DIR = os.getenv("TRACK_STORE_DIR", "track_store")
+TRACK_STORE_DTYPE = os.getenv("TRACK_STORE_DTYPE", "float32")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def track_path(content_hash: str, test_type: str, directory: str = TRACK_STORE_DIR) -> str:
+    """
+    Location of the stored track for one video analyzed as one test type.
+    """
+    slug = "".join(ch if ch.isalnum() else "_" for ch in test_type.lower())
+    return os.path.join(directory, f"{content_hash}_{slug}.ptrk")
+
+
+def save_track(path: str, track: PoseTrack, metadata: dict = None, dtype: str = TRACK_STORE_DTYPE):
+    """
+    Writes a PoseTrack to `path` atomically in the compact binary layout above.
+    """
+    dtype_code = 0 if np.dtype(dtype) == np.float16 else 1
+    meta = json.dumps(metadata or {}).encode("utf-8")
+    n_frames = len(track)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, dtype_code, n_frames, NUM_LANDMARKS, LANDMARK_DIMS,
+                          float(track.fps), int(track.width), int(track.height), len(meta))
+    data_offset = _aligned(_HEADER.size + len(meta))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(meta)
+        f.write(b"\0" * (data_offset - _HEADER.size - len(meta)))
+        f.write(np.ascontiguousarray(track.timestamps_ms, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(track.landmarks, dtype=_DTYPES[dtype_code]).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_track(path: str, mmap: bool = True):
+    """
+    Reads a stored track. Returns (PoseTrack, metadata dict).
+
+    With `mmap` the arrays are memory-mapped read-only instead of read into
+    memory, so opening even a long track is effectively free.
+    """
+    with open(path, "rb") as f:
+        raw = f.read(_HEADER.size)
+        if len(raw) < _HEADER.size:
+            raise ValueError(f"Truncated track file: {path}")
+        magic, version, dtype_code, n_frames, n_landmarks, dims, fps, width, height, meta_len = _HEADER.unpack(raw)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a supported track file: {path}")
+        metadata = json.loads(f.read(meta_len).decode("utf-8") or "{}")
+
+    dtype = np.dtype(_DTYPES[dtype_code]).newbyteorder("<")
+    ts_offset = _aligned(_HEADER.size + meta_len)
+    lm_offset = ts_offset + 8 * n_frames
+    shape = (n_frames, n_landmarks, dims)
+
+    if n_frames == 0:
+        timestamps = np.zeros(0, dtype=np.float64)
+        landmarks = np.zeros(shape, dtype=dtype)
+    elif mmap:
+        timestamps = np.memmap(path, dtype="<f8", mode="r", offset=ts_offset, shape=(n_frames,))
+        landmarks = np.memmap(path, dtype=dtype, mode="r", offset=lm_offset, shape=shape)
+    else:
+        with open(path, "rb") as f:
+            f.seek(ts_offset)
+            timestamps = np.fromfile(f, dtype="<f8", count=n_frames)
+            landmarks = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    return PoseTrack(landmarks, timestamps, fps, width, height), metadata
@@ -1,11 +1,9 @@
 # utils.py
 
-import cv2
 import numpy as np
-import requests
 import os
 import math
-import mediapipe as mp
+from analyzers.track import Landmark
 
 
 # -------------------------------
@@ -16,6 +14,8 @@ def download_video(video_url: str, temp_dir: str = "temp_videos") -> str:
     Downloads a video from a URL and saves it to a temporary file.
     Returns the path to the downloaded file.
     """
+    import requests  # only needed here; keeps the analyzer imports light
+
     if not os.path.exists(temp_dir):
         os.makedirs(temp_dir)
 
@@ -80,10 +80,46 @@ def average_angle(points: list) -> float:
 
 
 # -------------------------------
-# Pose & Landmark Utilities
+# Batch (Time-Series) Geometry
 # -------------------------------
-mp_pose = mp.solutions.pose
+# These take a whole landmark tensor of shape (N_frames, 33, D) as stored in a
+# PoseTrack and return one value per frame. Frames without a detected pose
+# (NaN rows) come out as NaN.
+
+def joint_angles(landmarks: np.ndarray, a: int, b: int, c: int, dims: int = 2) -> np.ndarray:
+    """
+    Angle (in degrees) at landmark 'b' formed with 'a' and 'c', for every frame.
+    Only the first `dims` coordinates are used (x, y by default, like the
+    per-frame analyzers).
+    """
+    pb = landmarks[:, b, :dims]
+    ba = landmarks[:, a, :dims] - pb
+    bc = landmarks[:, c, :dims] - pb
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine_angle = np.einsum("ij,ij->i", ba, bc) / np.sqrt(
+            np.einsum("ij,ij->i", ba, ba) * np.einsum("ij,ij->i", bc, bc))
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def landmark_distances(landmarks: np.ndarray, a: int, b: int, dims: int = 2) -> np.ndarray:
+    """
+    Euclidean distance between landmarks 'a' and 'b', for every frame.
+    """
+    diff = landmarks[:, a, :dims] - landmarks[:, b, :dims]
+    return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+
+def torso_angles(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Left shoulder-hip-knee angle for every frame (batch version of torso_angle).
+    """
+    return joint_angles(landmarks, Landmark.LEFT_SHOULDER, Landmark.LEFT_HIP, Landmark.LEFT_KNEE)
 
+
+# -------------------------------
+# Pose & Landmark Utilities
+# -------------------------------
 def get_landmark_coords(landmarks, idx, image_shape):
     """
     Converts normalized Mediapipe landmark (x,y) into pixel coordinates.
@@ -96,8 +132,8 @@ def is_knee_lifted(landmarks, image_shape, threshold: float = 0.5) -> bool:
     """
     Checks if the knee is lifted above the hip level (used for endurance/high knees).
     """
-    left_knee = get_landmark_coords(landmarks, mp_pose.PoseLandmark.LEFT_KNEE.value, image_shape)
-    left_hip = get_landmark_coords(landmarks, mp_pose.PoseLandmark.LEFT_HIP.value, image_shape)
+    left_knee = get_landmark_coords(landmarks, Landmark.LEFT_KNEE, image_shape)
+    left_hip = get_landmark_coords(landmarks, Landmark.LEFT_HIP, image_shape)
 
     return left_knee[1] < left_hip[1] * (1 - threshold)  # higher in image = smaller y
 
@@ -107,12 +143,12 @@ def torso_angle(landmarks) -> float:
     Calculates torso angle using shoulder and hip alignment.
     Useful for posture analysis.
     """
-    left_shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                     landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-    left_hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-    left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                 landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
+    left_shoulder = [landmarks[Landmark.LEFT_SHOULDER].x,
+                     landmarks[Landmark.LEFT_SHOULDER].y]
+    left_hip = [landmarks[Landmark.LEFT_HIP].x,
+                landmarks[Landmark.LEFT_HIP].y]
+    left_knee = [landmarks[Landmark.LEFT_KNEE].x,
+                 landmarks[Landmark.LEFT_KNEE].y]
 
     return calculate_angle(left_shoulder, left_hip, left_knee)
 
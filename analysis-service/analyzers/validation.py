@@ -0,0 +1,47 @@
+# validation.py
+
+import time
+
+# Options that bound any analysis, so they also bound the full-rate reference run.
+LIMIT_OPTIONS = ("max_duration_s", "time_budget_s", "frame_budget")
+
+
+def validate_sampling(analyze, video_path: str, *args, **options) -> dict:
+    """
+    Runs an analyzer once with its configured sampling and once at full
+    frame rate / resolution (without motion gating or ROI cropping), and
+    reports how far the sampled score drifts.
+
+    `analyze` is one of the analyzer entry points (e.g. situps.count_situps);
+    the sampled result is returned with a "sampling_validation" block added
+    to its report. `options` apply to the sampled run; of them only the
+    duration limit and budgets (LIMIT_OPTIONS) also apply to the reference
+    run, which goes second so an overlong video is rejected before any
+    full-rate decoding. A reference cut short by its budget gives no drift.
+    """
+    start = time.perf_counter()
+    sampled = analyze(video_path, *args, **options)
+    sampled_seconds = time.perf_counter() - start
+
+    limits = {name: options[name] for name in LIMIT_OPTIONS if name in options}
+    start = time.perf_counter()
+    full = analyze(video_path, *args, target_fps=None, max_resolution=None,
+                   motion_threshold=0, roi_crop=False, **limits)
+    full_seconds = time.perf_counter() - start
+
+    full_score = float(full.get("raw_score", 0))
+    sampled_score = float(sampled.get("raw_score", 0))
+    drift = sampled_score - full_score
+    truncated = full.get("report", {}).get("truncated")
+
+    sampled.setdefault("report", {})["sampling_validation"] = {
+        "full_rate_score": round(full_score, 2),
+        "sampled_score": round(sampled_score, 2),
+        "drift": None if truncated else round(drift, 2),
+        "relative_drift": None if truncated else (round(drift / full_score, 4) if full_score else 0.0),
+        "full_rate_truncated": truncated,
+        "full_rate_seconds": round(full_seconds, 3),
+        "sampled_seconds": round(sampled_seconds, 3),
+        "speedup": round(full_seconds / sampled_seconds, 2) if sampled_seconds else None,
+    }
+    return sampled
@@ -1,62 +1,67 @@
-import cv2
-import mediapipe as mp
+from analyzers.feedback import FeedbackEvents
+from analyzers.registry import ANALYZERS
+from analyzers.track import FrameConsumer, Landmark
 
-def calculate_height(video_path: str, athlete_height_cm: float) -> dict:
+
+ANALYSIS_FPS = ANALYZERS['Vertical Jump'].fps
+MAX_RESOLUTION = ANALYZERS['Vertical Jump'].max_resolution
+
+EXPLOSIVE_JUMP = "Explosive jump detected"
+
+
+class JumpHeightTracker(FrameConsumer):
     """
-    Calculates vertical jump height with deep feedback.
+    Tracks how far the heels rise above their starting height.
     """
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return {"raw_score": 0, "feedback": ["Could not open video."], "report": {}}
-
-    max_jump_height, start_pos_y, start_pos_x = 0, None, None
-    mistakes, strengths, tips = [], [], []
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
-
-        try:
-            landmarks = results.pose_landmarks.landmark
-            left_heel_y = landmarks[mp_pose.PoseLandmark.LEFT_HEEL.value].y
-            right_heel_y = landmarks[mp_pose.PoseLandmark.RIGHT_HEEL.value].y
-            avg_heel_y = (left_heel_y + right_heel_y) / 2
-
-            if start_pos_y is None:
-                start_pos_y = avg_heel_y
-                start_pos_x = landmarks[mp_pose.PoseLandmark.LEFT_HEEL.value].x
-
-            jump_height = (start_pos_y - avg_heel_y) * athlete_height_cm
-            if jump_height > max_jump_height:
-                max_jump_height = jump_height
-                strengths.append(f"Explosive jump detected: {round(max_jump_height,1)} cm")
+
+    def __init__(self, athlete_height_cm: float):
+        self.athlete_height_cm = athlete_height_cm
+        self.max_jump_height, self.start_pos_y, self.start_pos_x = 0, None, None
+        self.events = FeedbackEvents()
+
+    def update(self, chunk):
+        detected = chunk.detected
+        heels = chunk.landmarks[detected]
+        avg_heel_ys = heels[:, [Landmark.LEFT_HEEL, Landmark.RIGHT_HEEL], 1].mean(axis=1)
+        left_heel_xs = heels[:, Landmark.LEFT_HEEL, 0]
+        for avg_heel_y, left_heel_x, t_ms in zip(avg_heel_ys.tolist(), left_heel_xs.tolist(),
+                                                 chunk.timestamps_ms[detected].tolist()):
+            if self.start_pos_y is None:
+                self.start_pos_y = avg_heel_y
+                self.start_pos_x = left_heel_x
+
+            jump_height = (self.start_pos_y - avg_heel_y) * self.athlete_height_cm
+            if jump_height > self.max_jump_height:
+                self.max_jump_height = jump_height
+                self.events.strength(EXPLOSIVE_JUMP, t_ms)
 
             # Landing mistake
-            left_heel_x = landmarks[mp_pose.PoseLandmark.LEFT_HEEL.value].x
-            if start_pos_x and abs(left_heel_x - start_pos_x) * 100 > 30:
-                if "Poor landing" not in mistakes:
-                    mistakes.append("Landed too far from start")
-                    tips.append("Try to land softly and closer to starting point")
-
-        except:
-            pass
-
-    cap.release()
-    pose.close()
-
-    report = {
-        "jump_height_cm": round(max_jump_height, 2),
-        "mistakes": mistakes,
-        "strengths": strengths,
-        "tips": tips,
-        "analysis_summary": f"Best jump height: {round(max_jump_height,2)} cm."
-    }
-    feedback = strengths + mistakes + tips
-
-    return {"raw_score": max_jump_height, "feedback": feedback, "report": report}
+            if self.start_pos_x and abs(left_heel_x - self.start_pos_x) * 100 > 30:
+                self.events.mistake("Landed too far from start", t_ms)
+                self.events.tip("Try to land softly and closer to starting point", t_ms)
+
+    def result(self) -> dict:
+        max_jump_height = self.max_jump_height
+        fields, feedback = self.events.report()
+        # One entry for the best jump rather than one per improvement.
+        best = f"{EXPLOSIVE_JUMP}: {round(max_jump_height, 1)} cm"
+        fields["strengths"] = [best if m == EXPLOSIVE_JUMP else m for m in fields["strengths"]]
+        feedback = [best if m == EXPLOSIVE_JUMP else m for m in feedback]
+        report = {
+            "jump_height_cm": round(max_jump_height, 2),
+            **fields,
+            "analysis_summary": f"Best jump height: {round(max_jump_height,2)} cm."
+        }
+
+        return {"raw_score": max_jump_height, "feedback": feedback, "report": report}
+
+
+def calculate_height(video_path: str, athlete_height_cm: float, **options) -> dict:
+    """
+    Calculates vertical jump height with deep feedback.
+    """
+    from analyzers.engine import run_consumer
+
+    options.setdefault("target_fps", ANALYSIS_FPS)
+    options.setdefault("max_resolution", MAX_RESOLUTION)
+    return run_consumer(video_path, JumpHeightTracker(athlete_height_cm), **options)
@@ -0,0 +1,187 @@
+"""
+Offline bulk scoring for trial days.
+
+    python batch.py VIDEO_DIR --test-type "Sit-ups" [--output results.jsonl] [--workers N]
+    python batch.py --manifest manifest.jsonl [--output results.jsonl]
+
+A manifest is a JSON list or JSON Lines file of entries like
+{"video": "clips/a.mp4", "testType": "Vertical Jump", "athleteHeightCm": 172}.
+Results are written as one JSON line per video as soon as it finishes. Videos
+already present in the output file are skipped, so an interrupted run can
+simply be started again. A throughput summary is printed at the end.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analyzers.registry import ANALYZERS, PARAMETERS
+from scoring import scale_score
+from spool import hash_file
+from worker_pool import ANALYSIS_WORKERS, _warm_worker, run_analysis
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v", ".3gp"}
+
+# Manifest field for each request parameter an analyzer may require.
+MANIFEST_FIELDS = {"athlete_height_cm": "athleteHeightCm"}
+
+
+def find_videos(directory: str, test_type: str, athlete_height_cm: float = None) -> list:
+    entries = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                entries.append({
+                    "video": os.path.join(root, name),
+                    "testType": test_type,
+                    "athleteHeightCm": athlete_height_cm,
+                })
+    return entries
+
+
+def load_manifest(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def entry_error(entry) -> str:
+    """
+    Why a manifest entry cannot be scored, or None when it can.
+    """
+    if not isinstance(entry, dict):
+        return "Entry is not a JSON object."
+    if not isinstance(entry.get("video"), str) or not entry["video"]:
+        return "Entry has no video."
+    test_type = entry.get("testType")
+    if test_type not in ANALYZERS:
+        return f"Invalid test type: {test_type}" if test_type else "Entry has no testType."
+    for name in ANALYZERS[test_type].required:
+        if not entry.get(MANIFEST_FIELDS[name]):
+            return f"{PARAMETERS[name]} is required for {test_type}."
+    return None
+
+
+def invalid_record(entry, error: str) -> dict:
+    fields = entry if isinstance(entry, dict) else {}
+    return {"video": fields.get("video"), "testType": fields.get("testType"), "error": error}
+
+
+def entry_key(entry: dict) -> str:
+    return f"{entry['video']}|{entry['testType']}"
+
+
+def completed_keys(output_path: str) -> set:
+    """
+    Keys of the entries already recorded successfully in a previous run's output.
+    """
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if isinstance(record, dict) and "video" in record and "error" not in record:
+                done.add(entry_key(record))
+    return done
+
+
+def analyze_entry(entry: dict) -> dict:
+    """
+    Scores one manifest entry. Runs inside a worker process.
+    """
+    start = time.perf_counter()
+    record = {"video": entry["video"], "testType": entry["testType"]}
+    try:
+        result = run_analysis(entry["testType"], entry["video"], entry.get("athleteHeightCm"))
+        record.update({
+            "contentHash": hash_file(entry["video"]),
+            "raw_score": result.get("raw_score", 0),
+            "score": scale_score(result.get("raw_score", 0), entry["testType"]),
+            "feedback": result.get("feedback", []),
+            "report": result.get("report", {}),
+        })
+    except Exception as e:
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(entries: list, output, workers: int = ANALYSIS_WORKERS) -> dict:
+    """
+    Scores `entries` across `workers` processes, writing each record to the
+    `output` stream as it finishes. Returns the throughput summary.
+    """
+    start = time.perf_counter()
+    succeeded, failed = 0, 0
+    # Spawned like the service's workers, so no parent state (threads, locks) is inherited.
+    with ProcessPoolExecutor(max_workers=max(workers, 1), initializer=_warm_worker,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(analyze_entry, entry) for entry in entries]
+        for future in as_completed(futures):
+            record = future.result()
+            if "error" in record:
+                failed += 1
+            else:
+                succeeded += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "videos": len(entries),
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "videos_per_second": round(len(entries) / elapsed, 3) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many videos in one run.")
+    parser.add_argument("directory", nargs="?", help="Directory of videos (searched recursively).")
+    parser.add_argument("--test-type", help="Test type for every video in the directory.")
+    parser.add_argument("--athlete-height-cm", type=float, help="Athlete height for Vertical Jump videos.")
+    parser.add_argument("--manifest", help="JSON / JSON Lines manifest instead of a directory.")
+    parser.add_argument("--output", help="JSON Lines results file (appended to; enables resuming).")
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS or os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if args.manifest:
+        entries = load_manifest(args.manifest)
+    elif args.directory and args.test_type:
+        entries = find_videos(args.directory, args.test_type, args.athlete_height_cm)
+    else:
+        parser.error("give a directory with --test-type, or --manifest")
+
+    # Bad entries are reported one by one instead of aborting the run.
+    errors = [(entry, entry_error(entry)) for entry in entries]
+    valid = [entry for entry, error in errors if error is None]
+    done = completed_keys(args.output)
+    pending = [entry for entry in valid if entry_key(entry) not in done]
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for entry, error in errors:
+            if error is not None:
+                output.write(json.dumps(invalid_record(entry, error)) + "\n")
+        summary = run_batch(pending, output, args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary["invalid"] = len(entries) - len(valid)
+    summary["skipped"] = len(valid) - len(pending)
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Synthetic inputs for the benchmarks: landmark tracks that perform a known
+number of reps, and small generated videos for end-to-end timing.
+"""
+import os
+
+import numpy as np
+
+from analyzers.track import LANDMARK_DIMS, NUM_LANDMARKS, Landmark, PoseTrack
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), ".fixtures")
+
+# A standing athlete facing the camera, normalized image coordinates.
+_STANDING = {
+    Landmark.NOSE: (0.50, 0.15),
+    Landmark.LEFT_SHOULDER: (0.55, 0.28), Landmark.RIGHT_SHOULDER: (0.45, 0.28),
+    Landmark.LEFT_ELBOW: (0.58, 0.40), Landmark.RIGHT_ELBOW: (0.42, 0.40),
+    Landmark.LEFT_WRIST: (0.59, 0.52), Landmark.RIGHT_WRIST: (0.41, 0.52),
+    Landmark.LEFT_HIP: (0.53, 0.55), Landmark.RIGHT_HIP: (0.47, 0.55),
+    Landmark.LEFT_KNEE: (0.53, 0.72), Landmark.RIGHT_KNEE: (0.47, 0.72),
+    Landmark.LEFT_ANKLE: (0.53, 0.88), Landmark.RIGHT_ANKLE: (0.47, 0.88),
+    Landmark.LEFT_HEEL: (0.53, 0.90), Landmark.RIGHT_HEEL: (0.47, 0.90),
+}
+
+
+def _set_joint_angle(lm: np.ndarray, a: int, b: int, c: int, angle_deg: np.ndarray):
+    """
+    Swings landmark `c` around `b` (keeping its distance) so that the angle
+    a-b-c equals `angle_deg` in every frame.
+    """
+    ba = lm[:, a, :2] - lm[:, b, :2]
+    bc = lm[:, c, :2] - lm[:, b, :2]
+    base = np.arctan2(ba[:, 1], ba[:, 0])
+    theta = base + np.radians(angle_deg)
+    radius = np.linalg.norm(bc, axis=1)
+    lm[:, c, 0] = lm[:, b, 0] + radius * np.cos(theta)
+    lm[:, c, 1] = lm[:, b, 1] + radius * np.sin(theta)
+
+
+def make_track(test_type: str, seconds: float = 60.0, fps: float = 30.0, rep_period_s: float = 1.5,
+               dropout: float = 0.05, seed: int = 0) -> PoseTrack:
+    """
+    Builds a PoseTrack in which the athlete performs one rep of `test_type`
+    every `rep_period_s` seconds, with a fraction `dropout` of frames missing.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    t = np.arange(n) / fps
+    phase = (1 - np.cos(2 * np.pi * t / rep_period_s)) / 2  # 0 -> 1 -> 0 once per rep
+
+    lm = np.zeros((n, NUM_LANDMARKS, LANDMARK_DIMS), dtype=np.float32)
+    lm[:, :, 3] = 0.9
+    for idx, (x, y) in _STANDING.items():
+        lm[:, idx, 0], lm[:, idx, 1] = x, y
+
+    if test_type == "Sit-ups":
+        # Torso swings from lying flat (~175 deg at the hip) to sitting up (~60 deg).
+        _set_joint_angle(lm, Landmark.LEFT_KNEE, Landmark.LEFT_HIP, Landmark.LEFT_SHOULDER, 175.0 - 115.0 * phase)
+    elif test_type == "Push-ups":
+        # Wrist swings around the elbow from full extension (~170 deg) to ~70 deg.
+        _set_joint_angle(lm, Landmark.LEFT_SHOULDER, Landmark.LEFT_ELBOW, Landmark.LEFT_WRIST, 170.0 - 100.0 * phase)
+    elif test_type == "Endurance Run":
+        # Knees alternate above hip height, one lift per half period.
+        left = np.clip(np.sin(2 * np.pi * t / rep_period_s), 0, None)
+        right = np.clip(-np.sin(2 * np.pi * t / rep_period_s), 0, None)
+        lm[:, Landmark.LEFT_KNEE, 1] = 0.72 - 0.25 * left
+        lm[:, Landmark.RIGHT_KNEE, 1] = 0.72 - 0.25 * right
+    elif test_type == "Shuttle Run":
+        offset = 0.3 * np.sin(2 * np.pi * t / rep_period_s)
+        lm[:, :, 0] += offset[:, None]
+    elif test_type == "Vertical Jump":
+        lm[:, :, 1] -= (0.2 * phase ** 4)[:, None]
+    elif test_type == "Sprint":
+        lm[:, :, 0] += np.linspace(-0.5, 0.5, n, dtype=np.float32)[:, None]
+
+    lm[rng.random(n) < dropout] = np.nan
+    timestamps = t * 1000.0
+    return PoseTrack(lm, timestamps, fps, 1280, 720)
+
+
+def make_video(path: str, seconds: float = 10.0, fps: float = 30.0, width: int = 1280, height: int = 720):
+    """
+    Writes a synthetic clip of a moving stick figure. The detector may or may
+    not find a person in it; it exists to time decode + inference, not scoring.
+    """
+    import cv2
+
+    track = make_track("Push-ups", seconds, fps, dropout=0.0)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    bones = [(11, 13), (13, 15), (12, 14), (14, 16), (11, 12), (11, 23), (12, 24), (23, 24),
+             (23, 25), (25, 27), (24, 26), (26, 28)]
+    try:
+        for frame_landmarks in track.landmarks:
+            frame = np.full((height, width, 3), 200, dtype=np.uint8)
+            points = (frame_landmarks[:, :2] * [width, height]).astype(int)
+            for a, b in bones:
+                cv2.line(frame, tuple(map(int, points[a])), tuple(map(int, points[b])), (40, 40, 40), 12)
+            cv2.circle(frame, tuple(map(int, points[0])), 40, (40, 40, 40), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def fixture_video(name: str = "synthetic_720p30.mp4", **kwargs) -> str:
+    """
+    Returns a cached synthetic video, generating it on first use.
+    """
+    path = os.path.join(FIXTURE_DIR, name)
+    if not os.path.exists(path):
+        make_video(path, **kwargs)
+    return path
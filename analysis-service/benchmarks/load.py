@@ -0,0 +1,461 @@
+"""
+Load test for the /analyze endpoint.
+
+    python -m benchmarks.load [VIDEO_DIR] [--test-type "Sit-ups"] [--manifest manifest.jsonl]
+                              [--url http://localhost:8000/analyze]
+                              [--concurrency 1,2,4,8 | --rate 0.5,1,2 [--poisson]]
+                              [--duration 60] [--pid PID] [--slo 60] [--output load.json]
+
+Stands in for the backend's createSubmission call: every request is the same
+multipart upload (video, testType, athleteHeightCm) with the
+X-Internal-API-Secret header. Videos come from VIDEO_DIR or a manifest in the
+format batch.py reads, and are replayed round-robin; without either, the
+synthetic benchmark clip is used.
+
+Load models
+  * closed loop (--concurrency N): N clients each send their next request as
+    soon as the previous one is answered;
+  * open loop (--rate R): requests arrive R times per second (exponential
+    gaps with --poisson) however slow the service is, with at most
+    --max-in-flight outstanding; arrivals beyond that are counted as
+    "client_saturated" errors.
+A comma-separated list runs one step per value, in order, so one run can sweep
+the load past the knee of the curve.
+
+Each upload gets a few random bytes appended (skip with --reuse-cache) so the
+service's result and proxy caches never answer instead of the analyzers.
+
+Per step the results give latency percentiles of successful requests,
+throughput, errors by kind and a timeline sampled every --sample-interval
+seconds: host CPU, CPU and RSS of the service's process tree (--pid, read from
+/proc) and the service's own queue depth from /metrics. The knee is the step
+with the highest throughput whose error rate and p95 latency stay within
+--max-error-rate and --slo.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+
+from benchmarks.timing import environment
+
+DEFAULT_URL = os.getenv("ANALYSIS_SERVICE_URL", "http://localhost:8000/analyze")
+
+# Server-side gauges sampled from /metrics alongside CPU and RSS.
+SCRAPED_GAUGES = ("analysis_in_flight", "analysis_queue_depth", "analysis_workers_busy")
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class Corpus:
+    """
+    The videos to replay, read into memory once like the backend does.
+    """
+
+    def __init__(self, entries: list):
+        self.entries = []
+        for entry in entries:
+            with open(entry["video"], "rb") as f:
+                self.entries.append(dict(entry, body=f.read(), name=os.path.basename(entry["video"])))
+        self._next = itertools.count()
+
+    def next(self) -> dict:
+        return self.entries[next(self._next) % len(self.entries)]
+
+
+def submit(session: requests.Session, url: str, secret: str, entry: dict, timeout: float,
+           unique: bool = True) -> dict:
+    """
+    Sends one analysis request the way the backend does and returns its
+    start time, latency and outcome ("ok", "http_<status>", "timeout", "connection_error").
+    """
+    data = {"testType": entry["testType"]}
+    if entry.get("athleteHeightCm"):
+        data["athleteHeightCm"] = str(entry["athleteHeightCm"])
+    body = entry["body"] + os.urandom(16) if unique else entry["body"]
+
+    started = time.time()
+    clock = time.perf_counter()
+    cached = None
+    try:
+        response = session.post(url, files={"video": (entry["name"], body, "video/mp4")}, data=data,
+                                headers={"X-Internal-API-Secret": secret}, timeout=timeout)
+        if response.status_code == 200:
+            outcome = "ok"
+            cached = response.json().get("cached")
+        else:
+            outcome = f"http_{response.status_code}"
+    except requests.Timeout:
+        outcome = "timeout"
+    except requests.ConnectionError:
+        outcome = "connection_error"
+    return {
+        "started": started,
+        "seconds": time.perf_counter() - clock,
+        "outcome": outcome,
+        "testType": entry["testType"],
+        "cached": cached,
+    }
+
+
+def _cpu_seconds(pid: int) -> float:
+    """
+    CPU time of `pid` including its reaped children (e.g. ffmpeg), so the
+    total does not drop when a short-lived child exits between samples.
+    """
+    with open(f"/proc/{pid}/stat", "r") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return sum(int(value) for value in fields[11:15]) / CLOCK_TICKS  # utime stime cutime cstime
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def process_tree(pid: int) -> list:
+    """
+    `pid` and all of its descendants (uvicorn plus the analysis workers).
+    """
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(name))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, ()))
+    return tree
+
+
+def host_cpu() -> tuple:
+    """
+    (busy, total) jiffies of the whole machine from /proc/stat.
+    """
+    with open("/proc/stat", "r") as f:
+        values = [int(value) for value in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+    return sum(values) - idle, sum(values)
+
+
+def scrape_gauges(metrics_url: str) -> dict:
+    try:
+        text = requests.get(metrics_url, timeout=2).text
+    except requests.RequestException:
+        return {}
+    gauges = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in SCRAPED_GAUGES:
+            gauges[name] = float(value)
+    return gauges
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Samples host CPU, the service's CPU / RSS and its gauges every `interval`
+    seconds until stopped. CPU is in percent of one core, like top.
+    """
+
+    def __init__(self, interval: float, pid: int = None, metrics_url: str = None, in_flight=None):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.pid = pid
+        self.metrics_url = metrics_url
+        self.in_flight = in_flight
+        self.samples = []
+        self._stopped = threading.Event()
+
+    def _service(self) -> tuple:
+        cpu = rss = 0
+        for pid in process_tree(self.pid):
+            try:
+                cpu += _cpu_seconds(pid)
+                rss += _rss_bytes(pid)
+            except (OSError, IndexError, ValueError):
+                continue  # exited between listing and reading
+        return cpu, rss
+
+    def run(self):
+        start = time.perf_counter()
+        last_clock, last_host = start, host_cpu()
+        last_cpu = self._service()[0] if self.pid else None
+        while not self._stopped.wait(self.interval):
+            clock, host = time.perf_counter(), host_cpu()
+            sample = {
+                "t": round(clock - start, 2),
+                "host_cpu_percent": round(100 * os.cpu_count() * (host[0] - last_host[0])
+                                          / max(host[1] - last_host[1], 1), 1),
+            }
+            if self.pid:
+                cpu, rss = self._service()
+                sample["service_cpu_percent"] = round(100 * (cpu - last_cpu) / (clock - last_clock), 1)
+                sample["service_rss_mb"] = round(rss / 2 ** 20, 1)
+                last_cpu = cpu
+            if self.in_flight is not None:
+                sample["client_in_flight"] = self.in_flight()
+            if self.metrics_url:
+                sample.update(scrape_gauges(self.metrics_url))
+            self.samples.append(sample)
+            last_clock, last_host = clock, host
+
+    def stop(self) -> list:
+        self._stopped.set()
+        self.join()
+        return self.samples
+
+
+class Step:
+    """
+    One load level: runs it, then summarizes what it recorded.
+    """
+
+    def __init__(self, args, corpus: Corpus, concurrency: int = None, rate: float = None):
+        self.args = args
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.rate = rate
+        self.records = []
+        self.outstanding = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self):
+        with self._lock:
+            self.outstanding += 1
+        try:
+            record = submit(self._session(), self.args.url, self.args.secret, self.corpus.next(),
+                            self.args.timeout, unique=not self.args.reuse_cache)
+        finally:
+            with self._lock:
+                self.outstanding -= 1
+        with self._lock:
+            self.records.append(record)
+
+    def _closed_loop(self, deadline: float, budget):
+        def client():
+            while time.perf_counter() < deadline and next(budget, None) is not None:
+                self._send()
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _open_loop(self, deadline: float, budget):
+        slots = threading.BoundedSemaphore(self.args.max_in_flight)
+
+        def send():
+            try:
+                self._send()
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.args.max_in_flight) as executor:
+            arrival = time.perf_counter()
+            while arrival < deadline and next(budget, None) is not None:
+                time.sleep(max(0.0, arrival - time.perf_counter()))
+                if slots.acquire(blocking=False):
+                    executor.submit(send)
+                else:
+                    with self._lock:
+                        self.records.append({"started": time.time(), "seconds": 0.0,
+                                             "outcome": "client_saturated", "cached": None})
+                gap = random.expovariate(self.rate) if self.args.poisson else 1.0 / self.rate
+                arrival += gap
+
+    def run(self) -> dict:
+        budget = iter(range(self.args.requests)) if self.args.requests else itertools.repeat(0)
+        sampler = ResourceSampler(self.args.sample_interval, self.args.pid, self.args.metrics_url,
+                                  in_flight=lambda: self.outstanding)
+        sampler.start()
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        if self.rate:
+            self._open_loop(deadline, budget)
+        else:
+            self._closed_loop(deadline, budget)
+        elapsed = time.perf_counter() - start
+        return self.summary(elapsed, sampler.stop())
+
+    def summary(self, elapsed: float, timeline: list) -> dict:
+        ok = [record["seconds"] for record in self.records if record["outcome"] == "ok"]
+        errors = {}
+        for record in self.records:
+            if record["outcome"] != "ok":
+                errors[record["outcome"]] = errors.get(record["outcome"], 0) + 1
+        total = len(self.records)
+        summary = {
+            "concurrency": self.concurrency,
+            "offered_rate": self.rate,
+            "requests": total,
+            "succeeded": len(ok),
+            "cached_responses": sum(1 for record in self.records if record["cached"]),
+            "errors": errors,
+            "error_rate": round((total - len(ok)) / total, 4) if total else 0.0,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(len(ok) / elapsed, 4) if elapsed else 0.0,
+        }
+        if ok:
+            p50, p95, p99 = np.percentile(ok, [50, 95, 99])
+            summary["latency_seconds"] = {
+                "p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+                "mean": round(float(np.mean(ok)), 3), "max": round(max(ok), 3),
+            }
+        for key in ("service_cpu_percent", "service_rss_mb", "host_cpu_percent"):
+            values = [sample[key] for sample in timeline if key in sample]
+            if values:
+                summary[f"{key}_mean"] = round(float(np.mean(values)), 1)
+                summary[f"{key}_max"] = round(max(values), 1)
+        summary["timeline"] = timeline
+        return summary
+
+
+def find_knee(steps: list, max_error_rate: float, slo_seconds: float = None) -> dict:
+    """
+    The step with the highest throughput that kept its error rate and p95
+    latency within bounds, or None if no step did.
+    """
+    best = None
+    for index, step in enumerate(steps):
+        p95 = step.get("latency_seconds", {}).get("p95")
+        if p95 is None or step["error_rate"] > max_error_rate:
+            continue
+        if slo_seconds and p95 > slo_seconds:
+            continue
+        if best is None or step["throughput_per_second"] > best["throughput_per_second"]:
+            best = {"step": index, "concurrency": step["concurrency"], "offered_rate": step["offered_rate"],
+                    "throughput_per_second": step["throughput_per_second"], "p95_seconds": p95}
+    return best
+
+
+def wait_until_ready(ready_url: str, timeout: float):
+    """
+    Waits for /ready so a prewarming service is not measured cold.
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            status = requests.get(ready_url, timeout=2).status_code
+            if status != 503:
+                return
+        except requests.ConnectionError:
+            pass
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"Service at {ready_url} was not ready within {timeout:.0f}s.")
+        time.sleep(0.5)
+
+
+def _levels(text: str, kind) -> list:
+    return [kind(value) for value in text.split(",") if value.strip()] if text else []
+
+
+def corpus_entries(args) -> list:
+    # Imported here so the harness itself only needs requests and numpy.
+    if args.manifest:
+        from batch import load_manifest
+
+        entries = load_manifest(args.manifest)
+    elif args.video_dir:
+        from batch import find_videos
+
+        entries = find_videos(args.video_dir, args.test_type, args.athlete_height_cm)
+    else:
+        from benchmarks.fixtures import fixture_video
+
+        entries = [{"video": fixture_video(), "testType": args.test_type,
+                    "athleteHeightCm": args.athlete_height_cm}]
+    if not entries:
+        raise SystemExit("No videos to replay.")
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the /analyze endpoint.")
+    parser.add_argument("video_dir", nargs="?", help="Directory of videos to replay.")
+    parser.add_argument("--manifest", help="JSON / JSON Lines manifest of videos (see batch.py).")
+    parser.add_argument("--test-type", default="Sit-ups", help="Test type for VIDEO_DIR / the synthetic clip.")
+    parser.add_argument("--athlete-height-cm", type=float, help="Athlete height for VIDEO_DIR / the synthetic clip.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="The /analyze URL (default $ANALYSIS_SERVICE_URL).")
+    parser.add_argument("--secret", default=os.getenv("ANALYSIS_API_SECRET"),
+                        help="Internal API secret (default $ANALYSIS_API_SECRET).")
+    parser.add_argument("--concurrency", default="1", help="Closed-loop clients per step, comma-separated.")
+    parser.add_argument("--rate", help="Open-loop arrivals per second per step, comma-separated.")
+    parser.add_argument("--poisson", action="store_true", help="Exponential gaps between open-loop arrivals.")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Open-loop cap on outstanding requests.")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of new requests per step.")
+    parser.add_argument("--requests", type=int, help="Stop a step after this many requests.")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout in seconds.")
+    parser.add_argument("--reuse-cache", action="store_true", help="Send videos unchanged, allowing cache hits.")
+    parser.add_argument("--pid", type=int, help="Service PID whose process tree's CPU / RSS is sampled.")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between resource samples.")
+    parser.add_argument("--no-scrape", action="store_true", help="Do not sample the service's /metrics.")
+    parser.add_argument("--ready-timeout", type=float, default=120, help="Seconds to wait for /ready.")
+    parser.add_argument("--slo", type=float, help="p95 latency (seconds) a step must meet to count for the knee.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate a step may have for the knee.")
+    parser.add_argument("--pause", type=float, default=5, help="Seconds to let the service drain between steps.")
+    parser.add_argument("--output", default="-", help="Where to write the JSON results (default stdout).")
+    args = parser.parse_args(argv)
+    if not args.secret:
+        parser.error("set ANALYSIS_API_SECRET or pass --secret")
+
+    args.metrics_url = None if args.no_scrape else urljoin(args.url, "/metrics")
+    corpus = Corpus(corpus_entries(args))
+    wait_until_ready(urljoin(args.url, "/ready"), args.ready_timeout)
+
+    if args.rate:
+        levels = [{"rate": rate} for rate in _levels(args.rate, float)]
+    else:
+        levels = [{"concurrency": concurrency} for concurrency in _levels(args.concurrency, int)]
+
+    steps = []
+    for index, level in enumerate(levels):
+        if index:
+            time.sleep(args.pause)
+        step = Step(args, corpus, **level).run()
+        steps.append(step)
+        latency = step.get("latency_seconds", {})
+        print(f"{json.dumps(level)}: {step['requests']} requests, {step['throughput_per_second']}/s, "
+              f"p50 {latency.get('p50')}s p95 {latency.get('p95')}s p99 {latency.get('p99')}s, "
+              f"errors {step['error_rate']:.1%} {step['errors'] or ''}", file=sys.stderr)
+
+    report = {
+        "environment": environment(),
+        "target": {"url": args.url, "videos": [entry["video"] for entry in corpus.entries],
+                   "unique_uploads": not args.reuse_cache, "duration_seconds": args.duration},
+        "steps": steps,
+        "knee": find_knee(steps, args.max_error_rate, args.slo),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Analyzer benchmark suite.
+
+    python -m benchmarks.run [--quick] [--skip-video] [--output results.json]
+                             [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+                             [--save-baseline]
+
+Measures
+  * state-machine throughput (frames/sec) of every FrameConsumer, driven by
+    synthetic landmark tracks, so no video or pose model is involved;
+  * end-to-end latency and frames/sec of the pose engine per analyzer on a
+    generated video (skip with --skip-video);
+  * the landmark math micro-benchmark.
+
+Every benchmark runs for a minimum wall time and reports the median run.
+Results are written as JSON. With --baseline, one metric per benchmark
+(see COMPARED) is compared to the stored run and the exit status is 1 if
+any got worse by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+
+from analyzers.endurance import HighKneeCounter
+from analyzers.pushups import PushupCounter
+from analyzers.registry import ANALYZERS
+from analyzers.shuttle_run import ShuttleLapCounter
+from analyzers.situps import SitupCounter
+from analyzers.sprint import SprintTimer
+from analyzers.track import replay_track
+from analyzers.vertical_jump import JumpHeightTracker
+from benchmarks import landmark_math
+from benchmarks.fixtures import fixture_video, make_track
+from benchmarks.timing import environment, measure
+
+CONSUMERS = {
+    "Sit-ups": SitupCounter,
+    "Push-ups": PushupCounter,
+    "Endurance Run": HighKneeCounter,
+    "Shuttle Run": ShuttleLapCounter,
+    "Vertical Jump": lambda: JumpHeightTracker(170.0),
+    "Sprint": SprintTimer,
+}
+
+# The one metric per section the regression check compares; the others in
+# the results are derived from it or informational.
+COMPARED = {
+    "state_machines": "frames_per_second",
+    "end_to_end": "frames_per_second",
+    "landmark_math": "per_frame_us_after",
+}
+
+# Metrics where a bigger number is better; everything else is a cost.
+HIGHER_IS_BETTER = ("frames_per_second", "speedup")
+
+# Report fields the service must pass through beyond the standard ones.
+REQUIRED_REPORT_FIELDS = {
+    "Sprint": ("sprint_time_s", "status", "anomalies"),
+}
+
+
+class CountingConsumer:
+    """
+    Passes chunks on to a consumer and counts the frames it was given, which
+    is fewer than the track's when the consumer finishes early (e.g. Sprint).
+    """
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.frames = 0
+
+    @property
+    def done(self) -> bool:
+        return self.consumer.done
+
+    def update(self, chunk):
+        self.frames += len(chunk)
+        self.consumer.update(chunk)
+
+    def result(self) -> dict:
+        return self.consumer.result()
+
+
+def check_result(test_type: str, result: dict):
+    """
+    Fails if a consumer's result lost the raw_score / feedback / report shape
+    the service's endpoints read, or a field its report must carry.
+    """
+    assert "raw_score" in result and isinstance(result.get("feedback"), list), f"{test_type}: no score / feedback"
+    report = result.get("report")
+    assert isinstance(report, dict), f"{test_type}: no report"
+    missing = [field for field in REQUIRED_REPORT_FIELDS.get(test_type, ()) if field not in report]
+    assert not missing, f"{test_type}: report is missing {missing}"
+
+
+def bench_state_machines(seconds: float, min_seconds: float) -> dict:
+    results = {}
+    for test_type, make_consumer in CONSUMERS.items():
+        track = make_track(test_type, seconds=seconds)
+        counted = CountingConsumer(make_consumer())
+        replay_track(track, [counted])
+        check_result(test_type, counted.result())
+
+        def replay():
+            consumer = make_consumer()
+            replay_track(track, [consumer])
+            consumer.result()
+
+        median = measure(replay, min_seconds)
+        results[test_type] = {
+            "frames": counted.frames,
+            "seconds": round(median, 6),
+            "frames_per_second": round(counted.frames / median, 1),
+        }
+    return results
+
+
+def bench_end_to_end(video_seconds: float, min_seconds: float, min_runs: int) -> dict:
+    from analyzers.engine import process_video
+    from analyzers.pose_pool import pose_pool
+
+    video = fixture_video(f"synthetic_720p30_{int(video_seconds)}s.mp4", seconds=video_seconds)
+    pose_pool.warm_up()
+
+    results = {}
+    for test_type, make_consumer in CONSUMERS.items():
+        spec = ANALYZERS[test_type]
+        frames = 0
+
+        def analyze():
+            nonlocal frames
+            track = process_video(video, [make_consumer()], target_fps=spec.fps,
+                                  max_resolution=spec.max_resolution)
+            frames = len(track)  # frames decoded before any early stop
+
+        median = measure(analyze, min_seconds, min_runs)
+        results[test_type] = {
+            "video_seconds": video_seconds,
+            "frames": frames,
+            "latency_seconds": round(median, 4),
+            "frames_per_second": round(frames / median, 1),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a description of every compared metric that regressed beyond `tolerance`.
+    """
+    regressions = []
+    for section, entries in baseline.get("results", {}).items():
+        metric = COMPARED.get(section)
+        for name, metrics in entries.items():
+            old = metrics.get(metric)
+            new = results.get(section, {}).get(name, {}).get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = (old - new) / old
+            else:
+                change = (new - old) / old
+            if change > tolerance:
+                regressions.append(f"{section}/{name}/{metric}: {old} -> {new} ({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analyzers.")
+    parser.add_argument("--quick", action="store_true", help="Shorter inputs and fewer repeats.")
+    parser.add_argument("--skip-video", action="store_true", help="Skip end-to-end video runs (no MediaPipe needed).")
+    parser.add_argument("--output", default="-", help="Where to write the JSON results (default stdout).")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline.")
+    args = parser.parse_args(argv)
+
+    min_seconds = 0.5 if args.quick else 2.0
+    track_seconds = 60 if args.quick else 600
+    results = {
+        "state_machines": bench_state_machines(track_seconds, min_seconds),
+        "landmark_math": {"joint_angles": landmark_math.run(min_seconds=min_seconds)},
+    }
+    if not args.skip_video:
+        results["end_to_end"] = bench_end_to_end(5 if args.quick else 20, min_seconds, 1 if args.quick else 3)
+
+    report = {"environment": environment(), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
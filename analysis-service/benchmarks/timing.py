@@ -0,0 +1,42 @@
+"""
+Timing and environment helpers shared by the benchmarks. Kept free of the
+analyzer stack so client-side tools (benchmarks.load) can use them.
+"""
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+def measure(fn, min_seconds: float, min_runs: int = 3) -> float:
+    """
+    Calls `fn` until at least `min_seconds` of wall time and `min_runs` calls
+    have passed, and returns the median duration of one call in seconds.
+    A fixed wall time keeps millisecond-scale benchmarks from being decided
+    by a single noisy run.
+    """
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def environment() -> dict:
+    """
+    Describes the machine a run happened on, with the versions of the
+    numerical libraries the run has loaded.
+    """
+    env = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    for name, module in (("numpy", "numpy"), ("opencv", "cv2")):
+        if sys.modules.get(module) is not None:
+            env[name] = sys.modules[module].__version__
+    return env
@@ -0,0 +1,151 @@
+import importlib.util
+import os
+import time
+from collections import deque, namedtuple
+
+# Load-adaptive fidelity for queued jobs (off by default). When the queue
+# backs up or jobs miss the latency SLO, new jobs run at a cheaper tier and
+# are re-analyzed at the base tier once the service is idle again.
+ADAPTIVE_FIDELITY = os.getenv("ANALYSIS_ADAPTIVE_FIDELITY", "0") == "1"
+LATENCY_SLO_SECONDS = float(os.getenv("ANALYSIS_LATENCY_SLO_SECONDS", 60))
+BASE_TIER = os.getenv("ANALYSIS_BASE_FIDELITY", "standard")
+
+# Degrade one tier per this many analyses or jobs waiting per worker.
+QUEUE_PER_TIER = float(os.getenv("ANALYSIS_FIDELITY_QUEUE_STEP", 1))
+
+# Job latencies from this many recent seconds are judged against the SLO.
+LATENCY_WINDOW_SECONDS = 300
+
+# Fidelity tiers from best to cheapest. `fps` / `max_resolution` cap the
+# analyzer's preferred sampling (None keeps it).
+Tier = namedtuple("Tier", "name model_complexity fps max_resolution")
+
+TIERS = (
+    Tier("high", 2, None, None),
+    Tier("standard", 1, None, None),
+    Tier("reduced", 1, 10, 360),
+    Tier("minimal", 0, 6, 256),
+)
+TIER_NAMES = [tier.name for tier in TIERS]
+
+# Model file per Pose model complexity. Only the full model ships with the
+# MediaPipe wheel; the others are downloaded on first use.
+POSE_MODEL_FILES = {0: "pose_landmark_lite.tflite", 1: "pose_landmark_full.tflite", 2: "pose_landmark_heavy.tflite"}
+
+
+def installed_complexities() -> set:
+    """
+    Pose model complexities whose model file is present, found without
+    importing MediaPipe. A worker without network access cannot fetch the
+    others, so tiers fall back to the full model until they are installed.
+    """
+    found = importlib.util.find_spec("mediapipe")
+    if found is None or not found.submodule_search_locations:
+        return {1}
+    directory = os.path.join(list(found.submodule_search_locations)[0], "modules", "pose_landmark")
+    return {complexity for complexity, name in POSE_MODEL_FILES.items()
+            if os.path.exists(os.path.join(directory, name))} | {1}
+
+
+def _cap(preferred, limit):
+    if limit is None:
+        return preferred
+    return limit if preferred is None else min(preferred, limit)
+
+
+def tier_options(tier: Tier, spec) -> dict:
+    """
+    Engine options running the analyzer described by registry entry `spec` at `tier`.
+    """
+    return {
+        "model_complexity": tier.model_complexity,
+        "target_fps": _cap(spec.fps, tier.fps),
+        "max_resolution": _cap(spec.max_resolution, tier.max_resolution),
+    }
+
+
+def describe(tier: Tier, spec, degraded: bool) -> dict:
+    """
+    The report["fidelity"] block recording how a result was produced.
+    """
+    options = tier_options(tier, spec)
+    return {
+        "tier": tier.name,
+        "modelComplexity": options["model_complexity"],
+        "analysisFps": options["target_fps"],
+        "maxResolution": options["max_resolution"],
+        "degraded": degraded,
+    }
+
+
+class FidelityPolicy:
+    """
+    Picks the fidelity tier for each job from the backlog (analyses waiting
+    in the pool plus jobs waiting in `scheduler`'s queue) and the p95 of
+    recent job latencies against LATENCY_SLO_SECONDS.
+
+    Each full QUEUE_PER_TIER waiting per worker, and each multiple of the
+    SLO the p95 latency exceeds, move one tier down from the base tier; the
+    larger of the two wins.
+    """
+
+    def __init__(self, pool, scheduler=None, enabled: bool = ADAPTIVE_FIDELITY,
+                 slo_seconds: float = LATENCY_SLO_SECONDS, base: str = BASE_TIER,
+                 queue_per_tier: float = QUEUE_PER_TIER):
+        self.pool = pool
+        self.scheduler = scheduler
+        self.enabled = enabled
+        self.slo_seconds = slo_seconds
+        self.base = TIER_NAMES.index(base) if base in TIER_NAMES else TIER_NAMES.index("standard")
+        installed = installed_complexities()
+        self.tiers = [tier if tier.model_complexity in installed else tier._replace(model_complexity=1)
+                      for tier in TIERS]
+        self.queue_per_tier = max(queue_per_tier, 0.1)
+        self.latencies = deque()  # (monotonic time, seconds)
+        self.last_busy = time.monotonic()
+
+    @property
+    def base_tier(self) -> Tier:
+        return self.tiers[self.base]
+
+    def observe(self, seconds: float):
+        """
+        Records one job's latency (queue wait plus analysis).
+        """
+        self.latencies.append((time.monotonic(), seconds))
+
+    def p95(self) -> float:
+        cutoff = time.monotonic() - LATENCY_WINDOW_SECONDS
+        while self.latencies and self.latencies[0][0] < cutoff:
+            self.latencies.popleft()
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(seconds for _, seconds in self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    @property
+    def backlog(self) -> int:
+        """
+        Work waiting for a worker. The job scheduler runs one dispatcher per
+        worker, so queued jobs wait in its queue, not in the pool's.
+        """
+        queued_jobs = self.scheduler.queued if self.scheduler is not None else 0
+        return self.pool.queue_depth + queued_jobs
+
+    def choose(self) -> Tier:
+        if not self.enabled:
+            return self.base_tier
+        steps = int(self.backlog / max(self.pool.workers, 1) / self.queue_per_tier)
+        if self.slo_seconds > 0:
+            steps = max(steps, int(self.p95() / self.slo_seconds))
+        return self.tiers[min(self.base + steps, len(self.tiers) - 1)]
+
+    def idle(self, quiet_seconds: float = 0) -> bool:
+        """
+        True once no analysis has been admitted for `quiet_seconds`.
+        """
+        now = time.monotonic()
+        if self.pool.in_flight:
+            self.last_busy = now
+            return False
+        return now - self.last_busy >= quiet_seconds
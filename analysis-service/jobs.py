@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from analyzers.registry import COST_LONG, spec
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_LIMIT = int(os.getenv("ANALYSIS_JOB_QUEUE_LIMIT", 200))
+JOB_RETENTION_SECONDS = int(os.getenv("ANALYSIS_JOB_RETENTION_SECONDS", 3600))
+JOB_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_JOB_CALLBACK_TIMEOUT", 10))
+
+# Job callbacks only go to these origins (comma-separated, e.g.
+# "https://backend.internal:8443"), signed with JOB_CALLBACK_SECRET. Callbacks
+# are refused unless both are configured.
+JOB_CALLBACK_ORIGINS = [origin.strip().rstrip("/") for origin in
+                        os.getenv("ANALYSIS_CALLBACK_ORIGINS", "").split(",") if origin.strip()]
+JOB_CALLBACK_SECRET = os.getenv("ANALYSIS_CALLBACK_SECRET", "")
+
+# Lower runs first. Long clips (endurance, shuttle; the registry's "long"
+# cost class) are queued behind the short tests so a burst of long videos
+# cannot starve quick submissions.
+PRIORITY_SHORT = 0
+PRIORITY_LONG = 10
+
+
+def priority_for(test_type: str) -> int:
+    return PRIORITY_LONG if spec(test_type).cost == COST_LONG else PRIORITY_SHORT
+
+
+def _origin(url: str) -> str:
+    """
+    scheme://host:port of an http(s) URL without credentials, or None.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https") or not parts.hostname or parts.username or parts.password:
+        return None
+    port = port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname.lower()}:{port}"
+
+
+def callback_allowed(url: str, origins=None) -> bool:
+    """
+    Whether job results may be POSTed to `url`: an http(s) URL on one of the
+    configured callback origins.
+    """
+    origins = JOB_CALLBACK_ORIGINS if origins is None else origins
+    origin = _origin(url)
+    return origin is not None and origin in {_origin(allowed) for allowed in origins}
+
+
+def sign_callback(body: bytes, timestamp: str, secret: str) -> str:
+    """
+    Hex HMAC-SHA256 of "<timestamp>.<body>", sent as X-Callback-Signature so
+    the receiver can check the callback came from this service.
+    """
+    message = timestamp.encode("ascii") + b"." + body
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when no more jobs can be queued.
+    """
+
+
+class ProgressReporter:
+    """
+    Picklable progress callback handed to the analysis worker. It writes
+    (frames_processed, total_frames) into a shared Manager dict under the job id.
+    """
+
+    def __init__(self, shared, job_id: str):
+        self.shared = shared
+        self.job_id = job_id
+
+    def __call__(self, frames_processed: int, total_frames: int):
+        try:
+            self.shared[self.job_id] = (frames_processed, total_frames)
+        except Exception:
+            # Progress is best-effort; it must never fail the analysis.
+            pass
+
+
+class Job:
+    def __init__(self, test_type: str, params: dict, priority: int, callback_url: str = None):
+        self.id = uuid.uuid4().hex
+        self.test_type = test_type
+        self.params = params
+        self.priority = priority
+        self.callback_url = callback_url
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.regraded_at = None
+
+    def to_dict(self, progress=None) -> dict:
+        frames_processed, total_frames = progress or (0, 0)
+        if self.status == "completed":
+            frames_processed = max(frames_processed, total_frames)
+        return {
+            "jobId": self.id,
+            "testType": self.test_type,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": {
+                "framesProcessed": frames_processed,
+                "totalFrames": total_frames,
+                "fraction": round(frames_processed / total_frames, 3) if total_frames else None,
+            },
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "regradedAt": self.regraded_at,
+        }
+
+
+class JobScheduler:
+    """
+    In-process priority scheduler for analysis jobs.
+
+    Jobs wait in a priority queue (short tests first, FIFO within a priority)
+    and `concurrency` dispatcher tasks hand them to `runner`, an async
+    callable that performs the analysis and returns the response body.
+    Finished jobs are kept for JOB_RETENTION_SECONDS so clients can poll them.
+    Jobs still queued at shutdown are marked cancelled and passed to
+    `discard`, which releases whatever the runner would have (e.g. a spool).
+    """
+
+    def __init__(self, runner, concurrency: int = 1, max_queued: int = JOB_QUEUE_LIMIT,
+                 callback_secret: str = JOB_CALLBACK_SECRET, discard=None):
+        self.runner = runner
+        self.discard = discard
+        self.concurrency = max(concurrency, 1)
+        self.max_queued = max_queued
+        self.callback_secret = callback_secret
+        self.jobs = {}
+        self._queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._tasks = []
+        self._manager = None
+        self.progress = {}
+
+    def start(self):
+        import multiprocessing
+
+        # A Manager dict is visible to the worker processes, which report
+        # frame progress into it while the API process reads it.
+        self._manager = multiprocessing.Manager()
+        self.progress = self._manager.dict()
+        self._tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.concurrency)]
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            _, _, job_id = self._queue.get_nowait()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            job.status = "cancelled"
+            job.error = "The service shut down before the job ran."
+            job.finished_at = time.time()
+            if self.discard is not None:
+                self.discard(job)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self.progress = {}
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, job: Job) -> Job:
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+        self._prune()
+        self.jobs[job.id] = job
+        self._queue.put_nowait((job.priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return job.to_dict(self.progress.get(job_id))
+
+    def reporter(self, job: Job) -> ProgressReporter:
+        return ProgressReporter(self.progress, job.id)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            self.jobs.pop(job_id, None)
+            self.progress.pop(job_id, None)
+
+    async def _dispatch(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await self.runner(job)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = getattr(e, "detail", None) or str(e)
+            job.finished_at = time.time()
+            if job.callback_url:
+                await self.notify(job)
+
+    async def notify(self, job: Job):
+        """
+        POSTs the final job state to the job's callback URL, signed with the
+        callback secret (see sign_callback). Redirects are not followed, so
+        the request cannot be bounced to a host outside the allowlist.
+        """
+        import requests
+
+        if not self.callback_secret or not callback_allowed(job.callback_url):
+            logger.warning("Job %s callback to %s skipped: callbacks are not allowed there", job.id, job.callback_url)
+            return
+        body = json.dumps(job.to_dict(self.progress.get(job.id))).encode("utf-8")
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "X-Callback-Timestamp": timestamp,
+            "X-Callback-Signature": sign_callback(body, timestamp, self.callback_secret),
+        }
+        try:
+            await asyncio.to_thread(
+                requests.post, job.callback_url, data=body, headers=headers,
+                timeout=JOB_CALLBACK_TIMEOUT_SECONDS, allow_redirects=False,
+            )
+        except Exception as e:
+            logger.warning("Job %s callback to %s failed: %s", job.id, job.callback_url, e)
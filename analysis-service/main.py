@@ -1,106 +1,893 @@
+import time
+SERVICE_STARTED = time.perf_counter()
+
 import os
-import shutil
-from fastapi import FastAPI, Form, File, UploadFile, HTTPException, Header
-from analyzers import vertical_jump, situps, endurance, shuttle_run, pushups
+import re
+from contextlib import asynccontextmanager
+import asyncio
+import collections
+import json
+from typing import List, Optional
+from fastapi import FastAPI, Form, File, UploadFile, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from analyzers import ANALYZER_VERSION, registry
+from analyzers.errors import VideoTooLong
+from analyzers.track_store import TRACK_STORE_DIR, track_path
+import fidelity
+import metrics
+from result_cache import ResultCache, cache_key
+from scoring import scale_score
+from jobs import JOB_CALLBACK_SECRET, Job, JobQueueFull, JobScheduler, callback_allowed, priority_for
+from spool import MAX_UPLOAD_BYTES, MAX_VIDEO_SECONDS, SpoolFile, UploadTooLarge, hash_file
+from worker_pool import AnalysisPool, PoolSaturated, rescore_track, run_analysis, run_multi_analysis
+
+# Allowance for multipart boundaries and form fields on top of the video itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Most tests one /analyze/multi request may score from a single clip.
+MAX_TESTS_PER_VIDEO = 8
+
+# Default per-analysis budgets (0 = unlimited). When one runs out, decoding
+# stops and the partial result is returned with report["truncated"] set.
+# Requests may ask for a tighter budget, never a looser one.
+ANALYSIS_FRAME_BUDGET = int(os.getenv("ANALYSIS_FRAME_BUDGET", 0))
+ANALYSIS_TIME_BUDGET_SECONDS = float(os.getenv("ANALYSIS_TIME_BUDGET_SECONDS", 0))
+
+# Concurrent /analyze/live sessions. Each runs pose inference in this
+# process (on a thread) for as long as the athlete keeps recording.
+LIVE_SESSION_LIMIT = int(os.getenv("ANALYSIS_LIVE_SESSIONS", 2))
+MAX_LIVE_FRAME_BYTES = 4 * 1024 * 1024
+# A live client silent for this long is disconnected, freeing its session slot.
+LIVE_IDLE_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_LIVE_IDLE_SECONDS", 30))
+
+# Degraded jobs keep their spooled video until they are re-analyzed at the
+# base fidelity tier. The spools live in RAM-backed storage, so their total
+# size is capped: past it the oldest are deleted and those degraded results
+# stay final. The pass runs once no analysis was admitted for a while.
+REGRADE_MAX_BYTES = int(os.getenv("ANALYSIS_REGRADE_MAX_BYTES", 1024 * 1024 * 1024))
+REGRADE_QUIET_SECONDS = float(os.getenv("ANALYSIS_REGRADE_QUIET_SECONDS", 10))
+REGRADE_INTERVAL_SECONDS = 5
 
-app = FastAPI(title="Khel Pratibha Analysis Service")
+# Server-side directory the /batch endpoint may read videos from ("" disables /batch).
+BATCH_ROOT = os.getenv("ANALYSIS_BATCH_ROOT", "")
 
 # This secret should be stored securely, e.g., as an environment variable
 INTERNAL_API_SECRET = "khel-pratibha-internal-secret-987xyz"
 
-def scale_score(score: float, test_type: str) -> float:
+analysis_pool = AnalysisPool()
+result_cache = ResultCache()
+
+# Jobs that ran below the base fidelity tier, oldest first, awaiting re-analysis.
+degraded_jobs = collections.deque()
+
+def retain_degraded(job: Job):
+    """
+    Keeps a degraded job's spool for re-analysis, deleting the oldest
+    retained spools while together they exceed REGRADE_MAX_BYTES. A spool
+    over the cap on its own is deleted right away instead.
+    """
+    if job.params["spool"].size > REGRADE_MAX_BYTES:
+        job.params["spool"].cleanup()
+        return
+    degraded_jobs.append(job)
+    retained = sum(j.params["spool"].size for j in degraded_jobs)
+    while degraded_jobs and retained > REGRADE_MAX_BYTES:
+        dropped = degraded_jobs.popleft()
+        retained -= dropped.params["spool"].size
+        dropped.params["spool"].cleanup()
+
+async def wait_for_worker():
+    """
+    Reserves a worker slot, waiting for one to free up instead of failing.
+    Used for work that was already accepted (queued jobs, batch entries).
+    """
+    while True:
+        try:
+            analysis_pool.acquire()
+            return
+        except PoolSaturated:
+            await asyncio.sleep(0.5)
+
+async def run_job(job: Job) -> dict:
+    """
+    Runs one queued job. Jobs wait for a free worker slot instead of being
+    rejected, since they have already been accepted into the job queue.
+    """
+    spool = job.params["spool"]
+    retained = False
+    try:
+        await wait_for_worker()
+        try:
+            # The tier is picked once the job holds a slot, from the load it sees then.
+            result = await analyze_file(
+                spool.path, job.params["content_hash"], job.test_type, job.params["athlete_height_cm"],
+                tier=fidelity_policy.choose(), on_progress=job_scheduler.reporter(job),
+            )
+        finally:
+            analysis_pool.release()
+        if not result["cached"]:
+            fidelity_policy.observe(time.time() - job.created_at)
+        if result["report"].get("fidelity", {}).get("degraded"):
+            retain_degraded(job)
+            retained = True
+        return result
+    finally:
+        if not retained:
+            spool.cleanup()
+
+async def regrade_degraded_jobs():
+    """
+    Background pass that re-analyzes degraded jobs at the base fidelity tier
+    whenever the service is idle, replaces their results and re-sends their
+    callbacks. New submissions always go first.
+    """
+    while True:
+        await asyncio.sleep(REGRADE_INTERVAL_SECONDS)
+        while degraded_jobs and not job_scheduler.queued and fidelity_policy.idle(REGRADE_QUIET_SECONDS):
+            job = degraded_jobs.popleft()
+            spool = job.params["spool"]
+            try:
+                await wait_for_worker()
+                try:
+                    result = await analyze_file(
+                        spool.path, job.params["content_hash"], job.test_type, job.params["athlete_height_cm"],
+                        tier=fidelity_policy.base_tier,
+                    )
+                finally:
+                    analysis_pool.release()
+                print(f"⬆️ Re-analyzed degraded job {job.id} at full fidelity.")
+                job.result = result
+                job.regraded_at = time.time()
+                if job.callback_url:
+                    await job_scheduler.notify(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Re-analysis of degraded job {job.id} failed: {e}")
+            finally:
+                spool.cleanup()
+
+job_scheduler = JobScheduler(run_job, concurrency=max(analysis_pool.workers, 1),
+                             discard=lambda job: job.params["spool"].cleanup())
+fidelity_policy = fidelity.FidelityPolicy(analysis_pool, job_scheduler)
+metrics.register_pool(analysis_pool, job_scheduler)
+metrics.registry.register(metrics.Gauge(
+    "analysis_jobs_degraded_pending", "Degraded jobs waiting to be re-analyzed at full fidelity.",
+    function=lambda: len(degraded_jobs)))
+
+# Seconds from importing this module to serving requests, and to /ready.
+startup = {"serving_seconds": None, "ready_seconds": None}
+
+async def prewarm():
+    """
+    Runs the workers' prewarm phase in the background; /ready reports 503 until it is done.
+    """
+    await asyncio.to_thread(analysis_pool.warm)
+    startup["ready_seconds"] = round(time.perf_counter() - SERVICE_STARTED, 3)
+    print(f"🔥 Analysis workers warm: {analysis_pool.cold_start}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A registry entry pointing at a missing function must stop the service
+    # from starting, not fail the first request for that test.
+    registry.validate()
+    # Workers are created right away but only warmed when prewarming is enabled,
+    # and then in the background so / answers while the models load.
+    analysis_pool.start(wait=False)
+    job_scheduler.start()
+    regrading = asyncio.create_task(regrade_degraded_jobs())
+    warming = asyncio.create_task(prewarm()) if analysis_pool.prewarm else None
+    startup["serving_seconds"] = round(time.perf_counter() - SERVICE_STARTED, 3)
+    if warming is None:
+        startup["ready_seconds"] = startup["serving_seconds"]
+    yield
+    if warming is not None:
+        warming.cancel()
+    regrading.cancel()
+    while degraded_jobs:
+        degraded_jobs.popleft().params["spool"].cleanup()
+    # The pool goes first: running analyses still report progress through the
+    # scheduler's Manager, which its shutdown stops.
+    analysis_pool.shutdown()
+    await job_scheduler.shutdown()
+
+app = FastAPI(title="Khel Pratibha Analysis Service", lifespan=lifespan)
+
+def check_secret(x_internal_api_secret: str):
+    # Security check to ensure requests are coming from our own backend
+    if x_internal_api_secret != INTERNAL_API_SECRET:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+def check_test_type(testType: str, athleteHeightCm: float = None):
+    if testType not in registry.ANALYZERS:
+        raise HTTPException(status_code=400, detail=f"Invalid test type: {testType}")
+    params = {"athlete_height_cm": athleteHeightCm}
+    for name in registry.spec(testType).required:
+        if not params[name]:
+            raise HTTPException(status_code=400, detail=f"{registry.PARAMETERS[name]} is required for {testType}.")
+
+def result_height(testType: str, athleteHeightCm: float = None):
+    """
+    The athlete height if the test's analyzer uses it, else None, so cache
+    keys do not split on parameters that cannot change the result.
+    """
+    return athleteHeightCm if "athlete_height_cm" in registry.spec(testType).required else None
+
+def _tightest(requested, default):
+    limits = [limit for limit in (requested, default) if limit and limit > 0]
+    return min(limits) if limits else None
+
+def analysis_budget(timeBudgetSeconds: float = None, frameBudget: int = None) -> dict:
+    """
+    Engine options for a request's budget, bounded by the service defaults.
+    """
+    return {
+        "time_budget_s": _tightest(timeBudgetSeconds, ANALYSIS_TIME_BUDGET_SECONDS),
+        "frame_budget": _tightest(frameBudget, ANALYSIS_FRAME_BUDGET),
+    }
+
+def reserve_worker():
+    """
+    Reserves a worker slot, turning the request away with 503 when the pool
+    and its wait queue are full. Pair with analysis_pool.release().
+    """
+    try:
+        analysis_pool.acquire()
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis service is busy, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Refuses uploads whose declared size is over the limit before their body is read.
+    """
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        return JSONResponse(status_code=413, content={"detail": "Uploaded video is too large."})
+    return await call_next(request)
+
+# Multipart endpoints whose body FastAPI reads in full before the handler runs.
+MULTIPART_ANALYSIS_PATHS = {"/analyze", "/analyze/multi"}
+
+@app.middleware("http")
+async def reject_when_saturated(request: Request, call_next):
     """
-    Scales the raw score from an analysis to a 1-10 point system.
+    Turns multipart analysis requests away with 503 before their body is read
+    when the pool is already full. The handler still reserves its slot with
+    reserve_worker(), which stays the authoritative check.
     """
-    # Define the maximum possible score for each test to normalize the results.
-    # These values can be adjusted based on expected performance standards.
-    max_scores = {
-        'Vertical Jump': 100.0,  # Max jump height in cm
-        'Sit-ups': 50.0,         # Max reps in the given time
-        'Endurance Run': 150.0,  # Max high-knee reps
-        'Shuttle Run': 20.0,     # Max laps
-        'Push-ups': 50.0,        # Max reps
+    if (request.method == "POST" and request.url.path in MULTIPART_ANALYSIS_PATHS
+            and analysis_pool.in_flight >= analysis_pool.capacity):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Analysis service is busy, please retry shortly."},
+            headers={"Retry-After": "5"},
+        )
+    return await call_next(request)
+
+def reusable(report: dict) -> bool:
+    """
+    Whether a result may be cached: not cut short by a budget, and not a
+    failure to open or decode the video, which a retry may not repeat.
+    """
+    return "truncated" not in report and not report.get("unreadable")
+
+async def analyze_file(video_path: str, content_hash: str, testType: str,
+                       athleteHeightCm: float = None, validateSampling: bool = False,
+                       tier: fidelity.Tier = None, **options) -> dict:
+    """
+    Analyzes a video file on local disk, e.g. a fully spooled upload (or
+    serves it from the result cache), and returns the response body shared
+    by the analysis endpoints. `options` are passed on to the worker (e.g. a
+    progress reporter or budget); the service's default budget applies
+    unless `options` set one.
+
+    `tier` is the fidelity tier to run at (default: the base tier). It is
+    recorded in report["fidelity"]; results below the base tier are neither
+    cached nor stored for re-scoring.
+    """
+    for name, value in analysis_budget().items():
+        options.setdefault(name, value)
+    spec = registry.spec(testType)
+    tier = tier or fidelity_policy.base_tier
+    degraded = tier != fidelity_policy.base_tier
+    for name, value in fidelity.tier_options(tier, spec).items():
+        options.setdefault(name, value)
+
+    key = cache_key(content_hash, testType, result_height(testType, athleteHeightCm), ANALYZER_VERSION)
+    cached = None if validateSampling else result_cache.get(key)
+    if cached is not None:
+        print(f"♻️ Returning cached analysis for test '{testType}'.")
+        metrics.requests_total.inc(test_type=testType, outcome="cached")
+        return {"message": "Analysis successful", "cached": True, **cached}
+
+    start = time.perf_counter()
+    try:
+        print(f"🔬 Analyzing test '{testType}'...")
+
+        # Run the analyzer on a worker so the event loop stays responsive
+        stored_track = track_path(content_hash, testType) if TRACK_STORE_DIR and not degraded else None
+        analysis_result = await analysis_pool.run(
+            run_analysis, testType, video_path, athleteHeightCm, validateSampling, stored_track,
+            content_hash=content_hash, max_duration_s=MAX_VIDEO_SECONDS, **options,
+        )
+        metrics.record_analysis(testType, analysis_result.pop("stats", {}))
+        metrics.fidelity_tiers.inc(test_type=testType, tier=tier.name)
+
+        # Scale the raw score from the analysis
+        with metrics.stage_timer(testType, "scoring"):
+            scaled_score = scale_score(analysis_result.get("raw_score", 0), testType)
+        print(f"🏆 Analysis complete. Raw Score: {analysis_result.get('raw_score', 0)}, Scaled Score: {scaled_score}")
+
+    except VideoTooLong as e:
+        metrics.requests_total.inc(test_type=testType, outcome="rejected")
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        # Catch any errors during the analysis process
+        print(f"Error during analysis: {e}")
+        metrics.requests_total.inc(test_type=testType, outcome="error")
+        raise HTTPException(status_code=500, detail=f"Video analysis failed: {str(e)}")
+
+    metrics.requests_total.inc(test_type=testType, outcome="success")
+    metrics.request_seconds.observe(time.perf_counter() - start, test_type=testType)
+
+    response = {
+        "contentHash": content_hash,
+        "score": scaled_score,
+        "feedback": analysis_result.get("feedback", []),
+        "report": analysis_result.get("report", {})
     }
-    
-    # Get the max score for the given test type; default to 1.0 to avoid division by zero.
-    max_score = max_scores.get(test_type, 1.0)
-    if max_score == 0:
-        return 1.0
-
-    # Ensure the score does not exceed the maximum defined value.
-    score = min(float(score), max_score)
-    
-    # Linear scaling formula: 1 + (score / max_score) * 9
-    # This maps a score of 0 to 1 and the max_score to 10.
-    scaled_score = 1 + (score / max_score) * 9
-    
-    return round(scaled_score, 2)
+    response["report"]["fidelity"] = fidelity.describe(tier, spec, degraded)
+    # A degraded result depends on machine load; never reuse it.
+    if not validateSampling and not degraded and reusable(response["report"]):
+        result_cache.put(key, response)
+
+    # Return the complete analysis data
+    return {"message": "Analysis successful", "cached": False, **response}
 
 @app.post("/analyze")
 async def analyze_video(
     video: UploadFile = File(...),
     testType: str = Form(...),
     athleteHeightCm: float = Form(None),
+    validateSampling: bool = Form(False),
+    timeBudgetSeconds: float = Form(None),
+    frameBudget: int = Form(None),
     x_internal_api_secret: str = Header(...)
 ):
     """
     Main endpoint to receive a video, analyze it based on the test type,
     and return a scaled score, feedback, and a detailed report.
+
+    `timeBudgetSeconds` / `frameBudget` cap the analysis; if either runs out
+    the partial result is returned with `report.truncated` describing it.
+
+    Setting `validateSampling` also analyzes the video at full frame rate and
+    resolution and reports the score drift caused by frame subsampling.
+
+    Results are cached by video content, so re-submitting the same clip for
+    the same test returns the stored analysis without decoding it again. The
+    extracted landmark track is kept as well so /rescore can re-score the
+    video later without re-running pose inference.
     """
-    # Security check to ensure requests are coming from our own backend
-    if x_internal_api_secret != INTERNAL_API_SECRET:
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    check_secret(x_internal_api_secret)
+    check_test_type(testType, athleteHeightCm)
+
+    # The multipart body has already been received and parsed here (a full
+    # pool is turned away earlier by reject_when_saturated); reserving before
+    # spooling still keeps a saturated service from queueing without bound.
+    reserve_worker()
+    try:
+        with SpoolFile(video.filename) as spool:
+            try:
+                with metrics.stage_timer(testType, "spool"):
+                    content_hash = await spool.write_upload(video)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            return await analyze_file(spool.path, content_hash, testType, athleteHeightCm, validateSampling,
+                                      **analysis_budget(timeBudgetSeconds, frameBudget))
+    finally:
+        analysis_pool.release()
 
-    # Save the uploaded video file temporarily
-    temp_video_path = f"temp_{video.filename}"
-    with open(temp_video_path, "wb") as buffer:
-        shutil.copyfileobj(video.file, buffer)
+class TestSegment(BaseModel):
+    testType: str
+    athleteHeightCm: Optional[float] = None
+    startSeconds: Optional[float] = None
+    endSeconds: Optional[float] = None
 
-    analysis_result = {}
+def parse_test_segments(tests: str) -> List[TestSegment]:
     try:
-        print(f"🔬 Analyzing test '{testType}'...")
-        
-        # Route to the correct analyzer based on the test type
-        if testType == 'Vertical Jump':
-            if not athleteHeightCm:
-                raise HTTPException(status_code=400, detail="Athlete height is required for Vertical Jump.")
-            analysis_result = vertical_jump.calculate_height(temp_video_path, athleteHeightCm)
-        
-        elif testType == 'Sit-ups':
-            analysis_result = situps.count_reps(temp_video_path)
-            
-        elif testType == 'Endurance Run': # Mapped to high knees
-            analysis_result = endurance.count_high_knees(temp_video_path)
-            
-        elif testType == 'Shuttle Run':
-            analysis_result = shuttle_run.count_laps(temp_video_path)
-            
-        elif testType == 'Push-ups':
-            analysis_result = pushups.count_reps(temp_video_path)
-            
-        else:
-            raise HTTPException(status_code=400, detail=f"Invalid test type: {testType}")
-        
-        # Scale the raw score from the analysis
-        scaled_score = scale_score(analysis_result.get("raw_score", 0), testType)
-        print(f"🏆 Analysis complete. Raw Score: {analysis_result.get('raw_score', 0)}, Scaled Score: {scaled_score}")
+        segments = [TestSegment(**item) for item in json.loads(tests)]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="tests must be a JSON list of {testType, athleteHeightCm, startSeconds, endSeconds}.",
+        )
+    if not segments or len(segments) > MAX_TESTS_PER_VIDEO:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {MAX_TESTS_PER_VIDEO} tests.")
+    for segment in segments:
+        check_test_type(segment.testType, segment.athleteHeightCm)
+        start, end = segment.startSeconds, segment.endSeconds
+        if (start is not None and start < 0) or (end is not None and end <= (start or 0)):
+            raise HTTPException(status_code=400, detail=f"Invalid segment for {segment.testType}.")
+    return segments
 
+async def analyze_file_multi(video_path: str, content_hash: str, segments: List[TestSegment]) -> dict:
+    """
+    Scores several tests from one video file in a single decode / pose pass
+    and returns the combined response body of /analyze/multi.
+    """
+    descriptor = json.dumps([
+        [s.testType, result_height(s.testType, s.athleteHeightCm), s.startSeconds, s.endSeconds] for s in segments
+    ])
+    key = cache_key(content_hash, "multi:" + descriptor, None, ANALYZER_VERSION)
+    cached = result_cache.get(key)
+    if cached is not None:
+        print(f"♻️ Returning cached multi-test analysis ({len(segments)} tests).")
+        metrics.requests_total.inc(test_type="multi", outcome="cached")
+        return {"message": "Analysis successful", "cached": True, **cached}
+
+    tests = [
+        {"test_type": s.testType, "athlete_height_cm": s.athleteHeightCm,
+         "start_s": s.startSeconds, "end_s": s.endSeconds}
+        for s in segments
+    ]
+    start = time.perf_counter()
+    try:
+        print(f"🔬 Analyzing {len(tests)} tests in one pass: {', '.join(s.testType for s in segments)}...")
+        analysis = await analysis_pool.run(
+            run_multi_analysis, video_path, tests, content_hash=content_hash, max_duration_s=MAX_VIDEO_SECONDS,
+            **analysis_budget(),
+        )
+        metrics.record_analysis("multi", analysis.pop("stats", {}))
+    except VideoTooLong as e:
+        metrics.requests_total.inc(test_type="multi", outcome="rejected")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        # Catch any errors during the analysis process
-        print(f"Error during analysis: {e}")
+        print(f"Error during multi-test analysis: {e}")
+        metrics.requests_total.inc(test_type="multi", outcome="error")
         raise HTTPException(status_code=500, detail=f"Video analysis failed: {str(e)}")
+
+    results = []
+    for segment, result in zip(segments, analysis["results"]):
+        results.append({
+            "testType": segment.testType,
+            "startSeconds": segment.startSeconds,
+            "endSeconds": segment.endSeconds,
+            "score": scale_score(result.get("raw_score", 0), segment.testType),
+            "feedback": result.get("feedback", []),
+            "report": result.get("report", {}),
+        })
+    metrics.requests_total.inc(test_type="multi", outcome="success")
+    metrics.request_seconds.observe(time.perf_counter() - start, test_type="multi")
+
+    response = {"contentHash": content_hash, "results": results}
+    if all(reusable(result["report"]) for result in results):
+        result_cache.put(key, response)
+    return {"message": "Analysis successful", "cached": False, **response}
+
+@app.post("/analyze/multi")
+async def analyze_video_multi(
+    video: UploadFile = File(...),
+    tests: str = Form(...),
+    x_internal_api_secret: str = Header(...)
+):
+    """
+    Scores several drills recorded in one continuous clip. `tests` is a JSON
+    list such as [{"testType": "Sit-ups", "startSeconds": 0, "endSeconds": 60},
+    {"testType": "Vertical Jump", "athleteHeightCm": 172, "startSeconds": 60}].
+    The video is decoded and run through pose estimation once; every test's
+    analyzer sees only its own segment (the whole clip when none is given),
+    and the response lists each test's scaled score, feedback and report.
+    """
+    check_secret(x_internal_api_secret)
+    segments = parse_test_segments(tests)
+
+    reserve_worker()
+    try:
+        with SpoolFile(video.filename) as spool:
+            try:
+                with metrics.stage_timer("multi", "spool"):
+                    content_hash = await spool.write_upload(video)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            return await analyze_file_multi(spool.path, content_hash, segments)
     finally:
-        # Clean up the temporary video file
-        if os.path.exists(temp_video_path):
-            os.remove(temp_video_path)
+        analysis_pool.release()
 
-    # Return the complete analysis data
+@app.post("/analyze/stream")
+async def analyze_video_stream(
+    request: Request,
+    testType: str,
+    athleteHeightCm: float = None,
+    validateSampling: bool = False,
+    timeBudgetSeconds: float = None,
+    frameBudget: int = None,
+    x_internal_api_secret: str = Header(...)
+):
+    """
+    Streaming ingest: the request body is the raw video file and the test
+    parameters are query parameters. The body is written straight to the
+    spool directory as it arrives, skipping the multipart parser's own
+    temporary copy, and the size limit is enforced chunk by chunk.
+    """
+    check_secret(x_internal_api_secret)
+    check_test_type(testType, athleteHeightCm)
+
+    reserve_worker()
+    try:
+        with SpoolFile(request.headers.get("x-video-filename", "")) as spool:
+            try:
+                with metrics.stage_timer(testType, "spool"):
+                    content_hash = await spool.write_stream(request.stream())
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            return await analyze_file(spool.path, content_hash, testType, athleteHeightCm, validateSampling,
+                                      **analysis_budget(timeBudgetSeconds, frameBudget))
+    finally:
+        analysis_pool.release()
+
+live_sessions = 0
+
+async def live_receive(receive):
+    """
+    Awaits the next message of a live session, giving up with 408 once the
+    client has been idle for LIVE_IDLE_TIMEOUT_SECONDS.
+    """
+    try:
+        return await asyncio.wait_for(receive, LIVE_IDLE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=408, detail=f"No message for {LIVE_IDLE_TIMEOUT_SECONDS:.0f}s.")
+
+async def live_frames(websocket: WebSocket, testType: str, athleteHeightCm: float = None):
+    """
+    Scores a stream of encoded frames as they arrive and returns the
+    response body once the client ends the stream.
+    """
+    from analyzers.live import LiveAnalysis
+
+    # The first session of a test imports its analyzer; keep that off the event loop too.
+    consumer, spec = await asyncio.to_thread(registry.consumer, testType, athleteHeightCm)
+    session = await asyncio.to_thread(LiveAnalysis, consumer, spec.fps, spec.max_resolution)
+    start = time.perf_counter()
+    try:
+        await websocket.send_json({"type": "ready"})
+        timestamp_ms = None
+        while not session.done:
+            message = await live_receive(websocket.receive())
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is not None:
+                control = json.loads(message["text"])
+                if control.get("type") == "end":
+                    break
+                # Capture time of the next frame; defaults to its arrival time.
+                timestamp_ms = control.get("timestampMs")
+                continue
+
+            data = message.get("bytes") or b""
+            if len(data) > MAX_LIVE_FRAME_BYTES:
+                raise HTTPException(status_code=413, detail="Frame is too large.")
+            if timestamp_ms is None:
+                timestamp_ms = (time.perf_counter() - start) * 1000.0
+            if timestamp_ms > MAX_VIDEO_SECONDS * 1000.0:
+                raise HTTPException(status_code=413, detail=f"Stream is longer than the {MAX_VIDEO_SECONDS:.0f}s limit.")
+            try:
+                fed = await asyncio.to_thread(session.add_encoded, data, float(timestamp_ms))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            timestamp_ms = None
+            if fed:
+                await websocket.send_json({"type": "progress", **session.snapshot()})
+
+        analysis_result = await asyncio.to_thread(session.finish)
+    finally:
+        await asyncio.to_thread(session.close)
+
+    metrics.record_analysis(testType, session.stats())
+    metrics.requests_total.inc(test_type=testType, outcome="success")
+    metrics.request_seconds.observe(time.perf_counter() - start, test_type=testType)
     return {
         "message": "Analysis successful",
-        "score": scaled_score,
+        "cached": False,
+        "score": scale_score(analysis_result.get("raw_score", 0), testType),
+        "feedback": analysis_result.get("feedback", []),
+        "report": analysis_result.get("report", {}),
+    }
+
+async def live_video(websocket: WebSocket, testType: str, athleteHeightCm: float = None, filename: str = ""):
+    """
+    Spools encoded video chunks as they arrive and analyzes the clip the
+    moment the client ends the stream, skipping the separate upload.
+    """
+    with SpoolFile(filename) as spool:
+        await websocket.send_json({"type": "ready"})
+        while True:
+            message = await live_receive(websocket.receive())
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is not None:
+                if json.loads(message["text"]).get("type") == "end":
+                    break
+                continue
+            try:
+                spool.write(message.get("bytes") or b"")
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+        content_hash = spool.finish()
+
+        # The recording is already accepted, so wait for a worker instead of failing.
+        await wait_for_worker()
+        try:
+            return await analyze_file(spool.path, content_hash, testType, athleteHeightCm)
+        finally:
+            analysis_pool.release()
+
+@app.websocket("/analyze/live")
+async def analyze_live(websocket: WebSocket, x_internal_api_secret: str = Header(None)):
+    """
+    Live analysis while the athlete is still recording.
+
+    The first message is JSON: {"testType", "athleteHeightCm", "format"}.
+    With format "jpeg" (the default) every binary message is one encoded
+    frame (JPEG, PNG or WebP), optionally preceded by {"timestampMs": ...}
+    giving its capture time. The frames run through the same state machines
+    as /analyze and a {"type": "progress", "rawScore", ...} message is sent
+    back after every few analyzed frames. With format "video" binary
+    messages are consecutive chunks of one video file, analyzed as a whole.
+
+    The client sends {"type": "end"} when recording stops and receives the
+    /analyze response body as {"type": "result", ...} before the socket
+    closes. A jpeg stream also ends on its own once the test cannot change
+    any more (e.g. the shuttle run athlete has left). Errors arrive as
+    {"type": "error", "status", "detail"}; a client that sends nothing for
+    LIVE_IDLE_TIMEOUT_SECONDS gets status 408 and the socket is closed.
+    """
+    global live_sessions
+
+    await websocket.accept()
+    if x_internal_api_secret != INTERNAL_API_SECRET:
+        await websocket.close(code=1008, reason="Unauthorized")
+        return
+    if live_sessions >= LIVE_SESSION_LIMIT:
+        await websocket.close(code=1013, reason="Too many live sessions, try again shortly.")
+        return
+
+    live_sessions += 1
+    try:
+        start = await live_receive(websocket.receive_json())
+        testType = start.get("testType")
+        athleteHeightCm = start.get("athleteHeightCm")
+        check_test_type(testType, athleteHeightCm)
+        if start.get("format", "jpeg") == "video":
+            response = await live_video(websocket, testType, athleteHeightCm, start.get("filename", ""))
+        else:
+            response = await live_frames(websocket, testType, athleteHeightCm)
+        await websocket.send_json({"type": "result", **response})
+        await websocket.close()
+    except WebSocketDisconnect:
+        # The client went away before ending the stream; nothing to report to.
+        print("Live analysis stream closed by the client before it ended.")
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+        await websocket.close(code=1008 if e.status_code < 500 else 1011)
+    except (KeyError, ValueError, TypeError, AttributeError):
+        await websocket.send_json({"type": "error", "status": 400, "detail": "Malformed live analysis message."})
+        await websocket.close(code=1008)
+    except Exception as e:
+        print(f"Error during live analysis: {e}")
+        await websocket.send_json({"type": "error", "status": 500, "detail": f"Live analysis failed: {str(e)}"})
+        await websocket.close(code=1011)
+    finally:
+        live_sessions -= 1
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    video: UploadFile = File(...),
+    testType: str = Form(...),
+    athleteHeightCm: float = Form(None),
+    callbackUrl: str = Form(None),
+    priority: int = Form(None),
+    x_internal_api_secret: str = Header(...)
+):
+    """
+    Queues a video for analysis and returns a job id immediately. Poll
+    GET /jobs/{jobId} for progress and the result, or pass `callbackUrl` to
+    have the final job state POSTed there, signed with an HMAC of the body
+    (X-Callback-Signature). Only URLs on ANALYSIS_CALLBACK_ORIGINS are
+    accepted. Short tests are scheduled ahead of long endurance / shuttle-run
+    clips unless an explicit `priority` (lower runs first) is given.
+    """
+    check_secret(x_internal_api_secret)
+    check_test_type(testType, athleteHeightCm)
+    if callbackUrl and not (JOB_CALLBACK_SECRET and callback_allowed(callbackUrl)):
+        raise HTTPException(status_code=400, detail="callbackUrl is not an allowed callback target.")
+
+    spool = SpoolFile(video.filename)
+    try:
+        with metrics.stage_timer(testType, "spool"):
+            content_hash = await spool.write_upload(video)
+    except UploadTooLarge as e:
+        spool.cleanup()
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        spool.cleanup()
+        raise
+
+    if priority is None:
+        priority = priority_for(testType)
+    params = {"spool": spool, "content_hash": content_hash, "athlete_height_cm": athleteHeightCm}
+    job = Job(testType, params, priority, callbackUrl)
+    try:
+        job_scheduler.submit(job)
+    except JobQueueFull:
+        spool.cleanup()
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis job queue is full, please retry shortly.",
+            headers={"Retry-After": "30"},
+        )
+
+    print(f"🗂️ Queued job {job.id} for test '{testType}' (priority {priority}).")
+    return {"message": "Analysis job queued", "jobId": job.id, "status": job.status}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, x_internal_api_secret: str = Header(...)):
+    """
+    Reports a job's status, frame progress and, once finished, its result.
+    """
+    check_secret(x_internal_api_secret)
+    job = job_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+class BatchEntry(BaseModel):
+    video: str
+    testType: str
+    athleteHeightCm: Optional[float] = None
+
+class BatchRequest(BaseModel):
+    videos: List[BatchEntry]
+
+@app.post("/batch")
+async def analyze_batch(batch: BatchRequest, x_internal_api_secret: str = Header(...)):
+    """
+    Scores a manifest of videos that already sit under ANALYSIS_BATCH_ROOT
+    on the server, spreading them over all workers. The response streams one
+    JSON line per video as it finishes, followed by a summary line.
+
+    Results go through the result cache, so re-sending the manifest after an
+    interruption returns the finished videos instantly and resumes the rest.
+    """
+    check_secret(x_internal_api_secret)
+    if not BATCH_ROOT:
+        raise HTTPException(status_code=403, detail="Batch analysis is not enabled on this service.")
+
+    root = os.path.realpath(BATCH_ROOT)
+    for entry in batch.videos:
+        check_test_type(entry.testType, entry.athleteHeightCm)
+        path = os.path.realpath(os.path.join(root, entry.video))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            raise HTTPException(status_code=400, detail=f"Video not found under the batch root: {entry.video}")
+
+    # Never hold more entries in flight than there are workers, so interactive
+    # /analyze requests can still get a queue slot during a batch.
+    limit = asyncio.Semaphore(max(analysis_pool.workers, 1))
+
+    async def score(entry: BatchEntry) -> dict:
+        record = {"video": entry.video, "testType": entry.testType}
+        start = time.perf_counter()
+        async with limit:
+            try:
+                path = os.path.join(root, entry.video)
+                content_hash = await asyncio.to_thread(hash_file, path)
+                await wait_for_worker()
+                try:
+                    record.update(await analyze_file(path, content_hash, entry.testType, entry.athleteHeightCm))
+                finally:
+                    analysis_pool.release()
+            except HTTPException as e:
+                record["error"] = e.detail
+            except Exception as e:
+                record["error"] = str(e)
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        return record
+
+    async def stream():
+        start = time.perf_counter()
+        failed, cached = 0, 0
+        tasks = [asyncio.create_task(score(entry)) for entry in batch.videos]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                failed += "error" in record
+                cached += bool(record.get("cached"))
+                yield json.dumps(record) + "\n"
+        finally:
+            # The client went away: stop the entries still waiting or running
+            # (queued analyses are withdrawn from the pool, slots released).
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        yield json.dumps({"summary": {
+            "videos": len(batch.videos),
+            "failed": failed,
+            "cached": cached,
+            "seconds": round(elapsed, 3),
+            "videos_per_second": round(len(batch.videos) / elapsed, 3) if elapsed else None,
+        }}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/rescore")
+async def rescore_video(
+    contentHash: str = Form(...),
+    testType: str = Form(...),
+    athleteHeightCm: float = Form(None),
+    x_internal_api_secret: str = Header(...)
+):
+    """
+    Re-scores a previously analyzed video from its stored landmark track using
+    the current analyzer logic and score scaling. No video is needed.
+    """
+    check_secret(x_internal_api_secret)
+    if testType not in registry.ANALYZERS:
+        raise HTTPException(status_code=400, detail=f"Invalid test type: {testType}")
+    if not CONTENT_HASH_PATTERN.match(contentHash):
+        raise HTTPException(status_code=400, detail="Invalid content hash.")
+
+    stored_track = track_path(contentHash, testType)
+    if not TRACK_STORE_DIR or not os.path.exists(stored_track):
+        raise HTTPException(status_code=404, detail="No stored landmark track for this video and test type.")
+
+    reserve_worker()
+    try:
+        analysis_result = await analysis_pool.run(rescore_track, stored_track, testType, athleteHeightCm)
+    except Exception as e:
+        print(f"Error during re-scoring: {e}")
+        raise HTTPException(status_code=500, detail=f"Re-scoring failed: {str(e)}")
+    finally:
+        analysis_pool.release()
+
+    response = {
+        "contentHash": contentHash,
+        "score": scale_score(analysis_result.get("raw_score", 0), testType),
         "feedback": analysis_result.get("feedback", []),
         "report": analysis_result.get("report", {})
     }
+    return {"message": "Re-scoring successful", "cached": False, **response}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """
+    Prometheus scrape endpoint: per-test-type request and per-stage latency
+    histograms, frame counters, queue depth and worker utilization.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def read_ready():
+    """
+    Readiness probe, distinct from the liveness check at /: 503 until the
+    workers have finished prewarming (immediately 200 when prewarming is off).
+    Reports the service's startup and the workers' cold-start timings.
+    """
+    body = {
+        "ready": analysis_pool.ready,
+        "prewarm": analysis_pool.prewarm,
+        "startup": startup,
+        "workerColdStart": analysis_pool.cold_start,
+    }
+    return JSONResponse(status_code=200 if analysis_pool.ready else 503, content=body)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,215 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) for the latency histograms: from per-stage costs of
+# a few milliseconds up to the longest videos we accept.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Stages reported by the worker: importing analyzer modules on a cold
+# worker, proxy transcoding (see analyzers.proxy) and the pose engine (see
+# engine.process_video's `stats`).
+ENGINE_STAGES = ("import", "proxy", "open", "decode", "color_convert", "decode_wait", "motion_gate", "inference", "state_machine")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base for the metric types: a named family of series keyed by label values.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self):
+        """
+        Yields (suffix, label values, extra labels, value) for the exposition.
+        """
+        with self._lock:
+            items = list(self._series.items())
+        for key, value in items:
+            yield "", key, (), value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A gauge either set explicitly or, with `function`, read at scrape time.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels=(), function=None):
+        super().__init__(name, help, labels)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is not None:
+            yield "", (), (), self.function()
+        else:
+            yield from super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, dict(s, counts=list(s["counts"]))) for key, s in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                yield "_bucket", key, (("le", _number(float(bound))),), cumulative
+            yield "_sum", key, (), series["sum"]
+            yield "_count", key, (), series["count"]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        The Prometheus text exposition format (version 0.0.4).
+        """
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    "analysis_requests_total", "Analysis requests by test type and outcome.", ("test_type", "outcome")))
+request_seconds = registry.register(Histogram(
+    "analysis_request_seconds", "End-to-end analysis latency, excluding the upload.", ("test_type",)))
+stage_seconds = registry.register(Histogram(
+    "analysis_stage_seconds", "Time spent per analysis stage.", ("test_type", "stage")))
+frames_processed = registry.register(Counter(
+    "analysis_frames_processed_total", "Frames run through pose inference.", ("test_type",)))
+frames_without_pose = registry.register(Counter(
+    "analysis_frames_without_pose_total", "Analyzed frames in which no pose was detected.", ("test_type",)))
+frames_reused = registry.register(Counter(
+    "analysis_frames_reused_total", "Analyzed frames that reused landmarks because nothing moved.", ("test_type",)))
+motion_skip_ratio = registry.register(Histogram(
+    "analysis_motion_skip_ratio", "Per-request fraction of analyzed frames skipped by the motion gate.",
+    ("test_type",), buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)))
+fidelity_tiers = registry.register(Counter(
+    "analysis_fidelity_tier_total", "Analyses by the fidelity tier they ran at.", ("test_type", "tier")))
+early_stops = registry.register(Counter(
+    "analysis_early_stops_total", "Analyses that stopped decoding before the end of the video.",
+    ("test_type", "reason")))
+
+
+def register_pool(pool, scheduler=None):
+    """
+    Adds the scrape-time gauges describing the worker pool (and job queue).
+    """
+    registry.register(Gauge("analysis_workers", "Configured analysis workers.",
+                            function=lambda: max(pool.workers, 1)))
+    registry.register(Gauge("analysis_in_flight", "Admitted analyses, running or waiting for a worker.",
+                            function=lambda: pool.in_flight))
+    registry.register(Gauge("analysis_queue_depth", "Admitted analyses waiting for a free worker.",
+                            function=lambda: pool.queue_depth))
+    registry.register(Gauge("analysis_workers_busy", "Workers currently running an analysis.",
+                            function=lambda: pool.busy))
+    registry.register(Gauge("analysis_worker_utilization", "Fraction of workers currently busy.",
+                            function=lambda: pool.busy / max(pool.workers, 1)))
+    registry.register(Gauge("analysis_ready", "1 once the workers are ready (prewarmed if enabled).",
+                            function=lambda: int(pool.ready)))
+    registry.register(Gauge("analysis_worker_cold_start_seconds", "Time the last prewarm phase took.",
+                            function=lambda: pool.cold_start.get("seconds", 0)))
+    if scheduler is not None:
+        registry.register(Gauge("analysis_jobs_queued", "Jobs waiting in the job queue.",
+                                function=lambda: scheduler.queued))
+
+
+def observe_stage(test_type: str, stage: str, seconds: float):
+    stage_seconds.observe(seconds, test_type=test_type, stage=stage)
+
+
+@contextmanager
+def stage_timer(test_type: str, stage: str):
+    """
+    Times the enclosed block as one stage of a request for `test_type`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(test_type, stage, time.perf_counter() - start)
+
+
+def record_analysis(test_type: str, stats: dict):
+    """
+    Records the stage timings and frame counts a worker reported for one analysis.
+    """
+    for stage in ENGINE_STAGES:
+        if f"{stage}_seconds" in stats:
+            observe_stage(test_type, stage, stats[f"{stage}_seconds"])
+    frames_processed.inc(stats.get("frames_processed", 0), test_type=test_type)
+    frames_without_pose.inc(stats.get("frames_without_pose", 0), test_type=test_type)
+    frames_reused.inc(stats.get("frames_reused", 0), test_type=test_type)
+    if "motion_skip_ratio" in stats:
+        motion_skip_ratio.observe(stats["motion_skip_ratio"], test_type=test_type)
+    if stats.get("stop_reason"):
+        early_stops.inc(test_type=test_type, reason=stats["stop_reason"])
@@ -0,0 +1,78 @@
+"""
+Re-scores stored landmark tracks with the current analyzer logic.
+
+    python rescore.py [track files or directories ...] [--test-type "Sit-ups"] [--workers N]
+
+Defaults to every track in TRACK_STORE_DIR. Prints one JSON line per track
+followed by a summary line; no video is decoded and no pose model is run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzers.track_store import TRACK_STORE_DIR, load_track
+from scoring import scale_score
+from worker_pool import rescore_track
+
+
+def find_tracks(paths: list) -> list:
+    tracks = []
+    for path in paths:
+        if os.path.isdir(path):
+            tracks.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".ptrk"))
+        else:
+            tracks.append(path)
+    return tracks
+
+
+def rescore_one(path: str) -> dict:
+    try:
+        _, metadata = load_track(path)
+        test_type = metadata.get("test_type")
+        result = rescore_track(path)
+        return {
+            "track": os.path.basename(path),
+            "testType": test_type,
+            "raw_score": result.get("raw_score", 0),
+            "score": scale_score(result.get("raw_score", 0), test_type),
+            "recorded_with": metadata.get("analyzer_version"),
+        }
+    except Exception as e:
+        return {"track": os.path.basename(path), "error": str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score stored landmark tracks.")
+    parser.add_argument("paths", nargs="*", default=[TRACK_STORE_DIR])
+    parser.add_argument("--test-type", help="Only re-score tracks recorded for this test type.")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    tracks = find_tracks(args.paths)
+    if args.test_type:
+        tracks = [path for path in tracks if load_track(path)[1].get("test_type") == args.test_type]
+
+    start = time.perf_counter()
+    failed = 0
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            results = executor.map(rescore_one, tracks, chunksize=16)
+            for result in results:
+                failed += "error" in result
+                print(json.dumps(result), flush=True)
+    else:
+        for path in tracks:
+            result = rescore_one(path)
+            failed += "error" in result
+            print(json.dumps(result), flush=True)
+
+    elapsed = time.perf_counter() - start
+    summary = {"summary": {"tracks": len(tracks), "failed": failed, "seconds": round(elapsed, 3)}}
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
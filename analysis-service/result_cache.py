@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "result_cache")
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 512))     # in memory
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # on disk
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def cache_key(content_hash: str, test_type: str, athlete_height_cm: float = None, version: str = "") -> str:
+    """
+    Identifies one analysis: same video bytes, same test, same athlete height
+    and same analyzer version always produce the same result.
+    """
+    height = round(float(athlete_height_cm), 1) if athlete_height_cm else None
+    raw = json.dumps([content_hash, test_type, height, version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-level LRU cache of finished analysis responses.
+
+    Recent entries live in memory; every entry is also written to one small
+    JSON file on disk so hits survive restarts. Entries expire after `ttl`
+    seconds, and the least recently used files are evicted once the directory
+    exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESULT_CACHE_MAX_BYTES, ttl: int = RESULT_CACHE_TTL_SECONDS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _forget(self, key: str):
+        self._memory.pop(key, None)
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str):
+        """
+        Returns the cached value for `key`, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and key in self._disk:
+                try:
+                    with open(self._path(key), "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = None
+                if entry is None:
+                    self._forget(key)
+                    return None
+
+            if entry is None:
+                return None
+            if now - entry["created_at"] > self.ttl:
+                self._forget(key)
+                return None
+
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                os.utime(self._path(key))
+            return entry["value"]
+
+    def put(self, key: str, value: dict):
+        entry = {"created_at": time.time(), "value": value}
+        data = json.dumps(entry).encode("utf-8")
+        with self._lock:
+            self._forget(key)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+
+            self._memory[key] = entry
+            if len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+            while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+                self._forget(next(iter(self._disk)))
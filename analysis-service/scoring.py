@@ -0,0 +1,24 @@
+from analyzers.registry import spec
+
+
+def scale_score(score: float, test_type: str) -> float:
+    """
+    Scales the raw score from an analysis to a 1-10 point system.
+    """
+    # The registry declares the (worst, best) raw scores for each test; they
+    # can be adjusted there based on expected performance standards. Bounds
+    # may run downwards for tests where lower is better (sprint times).
+    worst, best = spec(test_type).bounds
+
+    # A missing result (no reps, no finish) always earns the minimum.
+    score = float(score)
+    if score <= 0:
+        return 1.0
+
+    # Ensure the score stays within the defined range.
+    score = min(max(score, min(worst, best)), max(worst, best))
+
+    # Linear scaling formula: maps the worst score to 1 and the best to 10.
+    scaled_score = 1 + (score - worst) / (best - worst) * 9
+
+    return round(scaled_score, 2)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+
+# Uploads are written here under unique names. tmpfs (/dev/shm) keeps the
+# spooled copy in memory so the analysis reads it back without disk I/O.
+SPOOL_DIR = os.getenv("ANALYSIS_SPOOL_DIR") or (
+    "/dev/shm/analysis-spool" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "analysis-spool")
+)
+SPOOL_CHUNK_SIZE = int(os.getenv("ANALYSIS_SPOOL_CHUNK_SIZE", 4 * 1024 * 1024))
+
+MAX_UPLOAD_BYTES = int(os.getenv("ANALYSIS_MAX_UPLOAD_BYTES", 300 * 1024 * 1024))
+MAX_VIDEO_SECONDS = float(os.getenv("ANALYSIS_MAX_VIDEO_SECONDS", 600))
+
+
+class UploadTooLarge(Exception):
+    """
+    Raised as soon as an upload grows past the configured size limit.
+    """
+
+
+def hash_file(path: str) -> str:
+    """
+    SHA-256 hex digest of a file already on disk, read in spool-sized chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _suffix(filename: str) -> str:
+    # Keep a short, safe extension; the rest of the client's filename is never used.
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext[1:].isalnum() and len(ext) <= 6 else ".bin"
+
+
+class SpoolFile:
+    """
+    A uniquely named spool file for one upload.
+
+    Chunks are hashed and size-checked as they are written, so the content
+    hash is ready the moment the upload finishes and oversized uploads are cut
+    off early. Use as a context manager: the file is always removed on exit.
+    """
+
+    def __init__(self, filename: str = "", max_bytes: int = MAX_UPLOAD_BYTES, directory: str = SPOOL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="upload_", suffix=_suffix(filename), dir=directory)
+        self._file = os.fdopen(fd, "wb", buffering=SPOOL_CHUNK_SIZE)
+        self._digest = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB limit.")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    async def write_upload(self, upload) -> str:
+        """
+        Spools a FastAPI UploadFile. Returns the SHA-256 hex digest.
+        """
+        while True:
+            chunk = await upload.read(SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.write(chunk)
+        return self.finish()
+
+    async def write_stream(self, stream) -> str:
+        """
+        Spools a raw request body as it arrives (e.g. `request.stream()`).
+        Returns the SHA-256 hex digest.
+        """
+        async for chunk in stream:
+            if chunk:
+                self.write(chunk)
+        return self.finish()
+
+    def finish(self) -> str:
+        self._file.close()
+        return self._digest.hexdigest()
+
+    def cleanup(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
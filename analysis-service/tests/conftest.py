@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The service's modules (main, worker_pool, analyzers, ...) are imported from
+# the analysis-service directory, as when it is run with uvicorn.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
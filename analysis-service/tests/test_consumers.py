@@ -0,0 +1,93 @@
+"""
+Scores of the per-test state machines on synthetic landmark tracks
+(benchmarks.fixtures), which perform a known number of reps.
+"""
+import numpy as np
+import pytest
+
+from analyzers.endurance import HighKneeCounter
+from analyzers.pushups import PushupCounter
+from analyzers.shuttle_run import ShuttleLapCounter
+from analyzers.situps import SitupCounter
+from analyzers.sprint import FINISH_LINE_X, START_LINE_X, SprintTimer
+from analyzers.track import CHUNK_SIZE, PoseTrack, replay_track
+from analyzers.vertical_jump import JumpHeightTracker
+from benchmarks.fixtures import make_track
+
+SECONDS = 30.0
+FPS = 30.0
+REP_PERIOD_S = 1.5
+REPS = int(SECONDS / REP_PERIOD_S)
+
+CONSUMERS = {
+    "Sit-ups": SitupCounter,
+    "Push-ups": PushupCounter,
+    "Endurance Run": HighKneeCounter,
+    "Shuttle Run": ShuttleLapCounter,
+    "Vertical Jump": lambda: JumpHeightTracker(170.0),
+    "Sprint": SprintTimer,
+}
+
+
+def score(test_type: str, dropout: float = 0.05) -> dict:
+    consumer = CONSUMERS[test_type]()
+    track = make_track(test_type, seconds=SECONDS, fps=FPS, rep_period_s=REP_PERIOD_S, dropout=dropout)
+    replay_track(track, [consumer])
+    return consumer.result()
+
+
+@pytest.mark.parametrize("test_type, expected", [
+    ("Sit-ups", REPS),
+    ("Push-ups", REPS),
+    # One lift of each knee per period.
+    ("Endurance Run", 2 * REPS),
+    # Two center-line crossings per period; the track starts on the line.
+    ("Shuttle Run", 2 * REPS - 1),
+])
+def test_rep_counts(test_type, expected):
+    assert score(test_type)["raw_score"] == expected
+
+
+def test_jump_height():
+    # The heels rise by at most 0.2 of the frame height for a 170 cm athlete.
+    result = score("Vertical Jump")
+    assert result["raw_score"] == pytest.approx(0.2 * 170.0, abs=0.5)
+    assert result["report"]["jump_height_cm"] == round(result["raw_score"], 2)
+
+
+def test_sprint_time():
+    # The shoulder crosses the frame at a constant speed over the whole track.
+    result = score("Sprint")
+    crossing_s = (FINISH_LINE_X - START_LINE_X) * (SECONDS - 1 / FPS)
+    assert result["raw_score"] == pytest.approx(crossing_s, abs=0.01)
+    assert result["report"]["status"] == "SUCCESS"
+
+
+def test_sprint_stops_consuming_at_the_finish():
+    timer = SprintTimer()
+    replay_track(make_track("Sprint", seconds=SECONDS, fps=FPS), [timer])
+    assert timer.done
+
+
+def test_dropped_frames_do_not_change_counts():
+    for test_type in CONSUMERS:
+        assert score(test_type, dropout=0.0)["raw_score"] == score(test_type, dropout=0.1)["raw_score"]
+
+
+@pytest.mark.parametrize("test_type", list(CONSUMERS))
+def test_chunking_does_not_change_results(test_type):
+    track = make_track(test_type, seconds=SECONDS, fps=FPS, rep_period_s=REP_PERIOD_S)
+    whole = CONSUMERS[test_type]()
+    whole.update(PoseTrack(np.asarray(track.landmarks), track.timestamps_ms, track.fps))
+    chunked = CONSUMERS[test_type]()
+    replay_track(track, [chunked])
+    assert len(track) > CHUNK_SIZE
+    assert whole.result() == chunked.result()
+
+
+@pytest.mark.parametrize("test_type", list(CONSUMERS))
+def test_result_shape(test_type):
+    result = score(test_type)
+    assert isinstance(result["feedback"], list)
+    assert isinstance(result["report"], dict)
+    assert "analysis_summary" in result["report"]
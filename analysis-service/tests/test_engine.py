@@ -0,0 +1,123 @@
+"""
+process_video with a stand-in pose estimator that "detects" the corners of
+a bright block, so frame-skipping features can be checked against plain runs.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from analyzers import engine  # noqa: E402
+from analyzers.situps import SitupCounter  # noqa: E402
+
+WIDTH, HEIGHT = 320, 240
+STILL_FRAMES, MOVING_FRAMES = 24, 40
+
+
+class BlockPose:
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        ys, xs = np.nonzero(image[:, :, 0] > 128)
+        if not len(xs):
+            return SimpleNamespace(pose_landmarks=None)
+        height, width = image.shape[:2]
+        corners = [SimpleNamespace(x=x / width, y=y / height, z=0.0, visibility=1.0)
+                   for x in (xs.min(), xs.max() + 1) for y in (ys.min(), ys.max() + 1)]
+        landmarks = [corners[i % len(corners)] for i in range(engine.NUM_LANDMARKS)]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+
+class BlockPosePool:
+    def __init__(self):
+        self.pose = BlockPose()
+        self.resets = 0
+
+    def checkout(self, model_complexity=1):
+        return self.pose
+
+    def checkin(self, pose):
+        pass
+
+    def reset(self, pose):
+        self.resets += 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = BlockPosePool()
+    monkeypatch.setattr(engine, "pose_pool", pool)
+    return pool
+
+
+@pytest.fixture
+def video(tmp_path):
+    """A block that stands still for a while, then crosses the frame."""
+    path = str(tmp_path / "block.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (WIDTH, HEIGHT))
+    for i in range(STILL_FRAMES + MOVING_FRAMES):
+        x = 40 + 4 * max(0, i - STILL_FRAMES)
+        frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        frame[100:160, x:x + 30] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def run(path, **options):
+    stats = {}
+    track = engine.process_video(path, stats=stats, decode_ahead=0, **options)
+    return track, stats
+
+
+def test_frame_skipping_is_off_by_default():
+    assert engine.MOTION_THRESHOLD == 0
+    assert engine.ROI_CROP is False
+
+
+def test_default_run_infers_every_frame(pool, video):
+    track, stats = run(video)
+    assert len(track) == STILL_FRAMES + MOVING_FRAMES
+    assert pool.pose.calls == len(track)
+    assert stats["frames_reused"] == 0
+    assert stats["frames_cropped"] == 0
+    assert pool.resets == 0
+
+    explicit, _ = run(video, motion_threshold=0, roi_crop=False)
+    np.testing.assert_array_equal(track.landmarks, explicit.landmarks)
+    np.testing.assert_array_equal(track.timestamps_ms, explicit.timestamps_ms)
+
+
+def test_motion_gate_reuses_landmarks_of_still_frames(pool, video):
+    plain, _ = run(video)
+    calls = pool.pose.calls
+    gated, stats = run(video, motion_threshold=0.002)
+
+    assert stats["frames_reused"] >= STILL_FRAMES - 2
+    assert pool.pose.calls - calls == len(gated) - stats["frames_reused"]
+    np.testing.assert_array_equal(gated.timestamps_ms, plain.timestamps_ms)
+    np.testing.assert_allclose(gated.landmarks[STILL_FRAMES:], plain.landmarks[STILL_FRAMES:])
+    np.testing.assert_allclose(gated.landmarks[:STILL_FRAMES], plain.landmarks[:STILL_FRAMES], atol=0.01)
+
+
+def test_roi_crop_matches_full_frame_landmarks(pool, video):
+    plain, _ = run(video)
+    cropped, stats = run(video, roi_crop=True)
+
+    # The block runs out of the crop; the rest of the clip falls back to full frames.
+    assert 0 < stats["frames_cropped"] < len(plain)
+    assert stats["roi_fallbacks"] == 1
+    assert not np.isnan(cropped.landmarks).any()
+    np.testing.assert_allclose(cropped.landmarks[:, :, :2], plain.landmarks[:, :, :2], atol=0.01)
+
+
+def test_unreadable_video(pool, tmp_path):
+    path = tmp_path / "junk.mp4"
+    path.write_bytes(b"not a video")
+    assert engine.run_consumer(str(path), SitupCounter()) == engine.unreadable_result()
+    assert pool.pose.calls == 0
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_get_and_put(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", {"raw_score": 12})
+    assert cache.get("a") == {"raw_score": 12}
+
+
+def test_entries_survive_restarts(tmp_path):
+    ResultCache(str(tmp_path)).put("a", {"raw_score": 12})
+    assert ResultCache(str(tmp_path)).get("a") == {"raw_score": 12}
+
+
+def test_expired_entries_are_dropped(tmp_path, clock):
+    cache = ResultCache(str(tmp_path), ttl=60)
+    cache.put("a", {"raw_score": 12})
+    clock[0] += 60
+    assert cache.get("a") == {"raw_score": 12}
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "a.json"))
+
+    # An expired file left on disk is not served after a restart either.
+    cache.put("b", {"raw_score": 3})
+    clock[0] += 61
+    assert ResultCache(str(tmp_path), ttl=60).get("b") is None
+
+
+def test_least_recently_used_file_is_evicted(tmp_path, clock):
+    value = {"raw_score": 1, "feedback": ["x" * 100]}
+    probe = ResultCache(str(tmp_path / "probe"))
+    probe.put("a", value)
+    size = os.path.getsize(os.path.join(str(tmp_path / "probe"), "a.json"))
+
+    cache = ResultCache(str(tmp_path / "cache"), max_entries=0, max_bytes=2 * size)
+    cache.put("a", value)
+    cache.put("b", value)
+    assert cache.get("a") == value  # "b" is now the least recently used
+    cache.put("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert sorted(os.listdir(str(tmp_path / "cache"))) == ["a.json", "c.json"]
+
+
+def test_memory_is_bounded(tmp_path):
+    cache = ResultCache(str(tmp_path), max_entries=2)
+    for key in "abc":
+        cache.put(key, {"key": key})
+    assert list(cache._memory) == ["b", "c"]
+    assert cache.get("a") == {"key": "a"}  # still served from disk
+
+
+def test_cache_key():
+    assert cache_key("h", "Sit-ups", 170, "1") == cache_key("h", "Sit-ups", 170.0, "1")
+    assert cache_key("h", "Sit-ups", 170, "1") != cache_key("h", "Sit-ups", 170, "2")
+    assert cache_key("h", "Sit-ups", None, "1") != cache_key("h", "Push-ups", None, "1")
@@ -0,0 +1,31 @@
+import pytest
+
+from analyzers.registry import ANALYZERS
+from scoring import scale_score
+
+
+@pytest.mark.parametrize("test_type", list(ANALYZERS))
+def test_bounds_map_to_one_and_ten(test_type):
+    worst, best = ANALYZERS[test_type].bounds
+    assert scale_score(worst, test_type) == 1.0
+    assert scale_score(best, test_type) == 10.0
+    assert scale_score((worst + best) / 2, test_type) == 5.5
+
+
+@pytest.mark.parametrize("test_type", list(ANALYZERS))
+def test_scores_beyond_the_bounds_are_clamped(test_type):
+    worst, best = ANALYZERS[test_type].bounds
+    assert scale_score(best + (best - worst) / 4, test_type) == 10.0
+    assert scale_score(worst - (best - worst) / 4, test_type) == 1.0
+
+
+@pytest.mark.parametrize("test_type", list(ANALYZERS))
+def test_missing_result_earns_the_minimum(test_type):
+    assert scale_score(0, test_type) == 1.0
+    assert scale_score(-1, test_type) == 1.0
+
+
+def test_sprint_lower_is_better():
+    assert scale_score(4.0, "Sprint") == 10.0
+    assert scale_score(12.0, "Sprint") == 1.0
+    assert scale_score(6.0, "Sprint") > scale_score(10.0, "Sprint")
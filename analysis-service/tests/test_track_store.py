@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from analyzers.track import LANDMARK_DIMS, NUM_LANDMARKS, PoseTrack
+from analyzers.track_store import load_track, save_track, track_path
+
+
+def make_track(n_frames: int = 50) -> PoseTrack:
+    rng = np.random.default_rng(0)
+    landmarks = rng.random((n_frames, NUM_LANDMARKS, LANDMARK_DIMS)).astype(np.float32)
+    landmarks[::7] = np.nan  # frames without a detected person
+    timestamps = np.arange(n_frames) * 1000.0 / 30.0
+    return PoseTrack(landmarks, timestamps, fps=30.0, width=1280, height=720)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_float32_round_trip_is_exact(tmp_path, mmap):
+    track = make_track()
+    path = str(tmp_path / "track.ptrk")
+    save_track(path, track, {"test_type": "Sit-ups", "athlete_height_cm": 172.5}, dtype="float32")
+
+    loaded, metadata = load_track(path, mmap=mmap)
+    assert metadata == {"test_type": "Sit-ups", "athlete_height_cm": 172.5}
+    assert (loaded.fps, loaded.width, loaded.height) == (30.0, 1280, 720)
+    np.testing.assert_array_equal(loaded.timestamps_ms, track.timestamps_ms)
+    np.testing.assert_array_equal(loaded.landmarks, track.landmarks)
+    np.testing.assert_array_equal(loaded.detected, track.detected)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_float16_round_trip(tmp_path, mmap):
+    track = make_track()
+    path = str(tmp_path / "track.ptrk")
+    save_track(path, track, dtype="float16")
+
+    loaded, metadata = load_track(path, mmap=mmap)
+    assert metadata == {}
+    assert loaded.landmarks.dtype == np.float16
+    np.testing.assert_array_equal(loaded.timestamps_ms, track.timestamps_ms)
+    np.testing.assert_allclose(loaded.landmarks.astype(np.float32), track.landmarks, atol=1e-3)
+    np.testing.assert_array_equal(loaded.detected, track.detected)
+
+
+def test_empty_track(tmp_path):
+    path = str(tmp_path / "empty.ptrk")
+    save_track(path, make_track(0))
+    loaded, _ = load_track(path)
+    assert len(loaded) == 0
+    assert loaded.landmarks.shape == (0, NUM_LANDMARKS, LANDMARK_DIMS)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "video.ptrk"
+    path.write_bytes(b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 64)
+    with pytest.raises(ValueError):
+        load_track(str(path))
+
+    path.write_bytes(b"PTRK")
+    with pytest.raises(ValueError):
+        load_track(str(path))
+
+
+def test_track_path_is_per_test_type(tmp_path):
+    a = track_path("abc", "Sit-ups", str(tmp_path))
+    b = track_path("abc", "Push-ups", str(tmp_path))
+    assert a != b
+    assert a.endswith(".ptrk")
@@ -0,0 +1,368 @@
+import asyncio
+import contextlib
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Number of analysis worker processes. 0 runs analyses on a thread inside the
+# API process instead (useful for local debugging).
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 1))
+
+# How many admitted requests may wait for a free worker before new ones are rejected.
+ANALYSIS_QUEUE_LIMIT = int(os.getenv("ANALYSIS_QUEUE_LIMIT", ANALYSIS_WORKERS or 1))
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when every worker is busy and the wait queue is full.
+    """
+
+
+# Opt-in prewarm phase: workers import every analyzer and build (and run one
+# dummy inference through) the Pose graph before the service reports ready.
+# Without it workers start cold and load what a request needs on first use.
+ANALYSIS_PREWARM = os.getenv("ANALYSIS_PREWARM", "0") == "1"
+
+# How long warm() lets each worker wait for the others to start.
+WARM_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_WARM_TIMEOUT_SECONDS", 300))
+
+# How this worker process started up (see _worker_startup).
+_startup = {}
+
+
+def _warm_worker():
+    """
+    Prewarm phase, run once in every worker process so the first request does
+    not pay for importing OpenCV / MediaPipe, the analyzer modules or building
+    the Pose graph. Records how long each part took.
+    """
+    from analyzers import registry
+
+    start = time.perf_counter()
+    registry.load_all()
+    imported = time.perf_counter()
+
+    from analyzers.pose_pool import pose_pool
+
+    pose_pool.warm_up()
+    _startup.update({
+        "import_seconds": round(imported - start, 3),
+        "model_seconds": round(time.perf_counter() - imported, 3),
+    })
+
+
+def _worker_startup(barrier=None) -> dict:
+    """
+    Reports this worker's pid and its prewarm timings, if it was prewarmed.
+
+    Waiting on `barrier` (one party per worker) keeps this worker busy until
+    every other worker has picked up its own startup task, so each one runs
+    exactly one instead of the first warm worker answering them all.
+    """
+    if barrier is not None:
+        try:
+            barrier.wait(WARM_TIMEOUT_SECONDS)
+        except threading.BrokenBarrierError:
+            pass  # warm() reports how many workers did start
+    return {"pid": os.getpid(), **_startup}
+
+
+def _import_cost(stats: dict, imported_before: float):
+    """
+    Adds the time this call spent importing analyzer modules (a cold worker's
+    first request for a test type) to `stats` as the "import" stage.
+    """
+    from analyzers import registry
+
+    if registry.import_seconds > imported_before:
+        stats["import_seconds"] = round(registry.import_seconds - imported_before, 6)
+
+
+def _resolve_analyzer(test_type: str, athlete_height_cm: float = None):
+    """
+    Returns the analyzer entry point for a test type plus its extra arguments.
+    """
+    from analyzers import registry
+
+    return registry.entry_point(test_type, athlete_height_cm)
+
+
+def _resolve_consumer(test_type: str, athlete_height_cm: float = None):
+    """
+    Returns a fresh state machine for a test type plus its registry entry.
+    """
+    from analyzers import registry
+
+    return registry.consumer(test_type, athlete_height_cm)
+
+
+@contextlib.contextmanager
+def _decode_source(video_path: str, content_hash: str, stats: dict, options: dict):
+    """
+    Yields the normalized proxy to decode instead of the original upload (see
+    analyzers.proxy), or the original when no proxy can be made. The proxy
+    cannot be evicted until the block exits.
+
+    A budgeted analysis (time or frame budget in `options`) only uses a proxy
+    that is already cached: transcoding happens before the engine starts and
+    would not count against the budget.
+    """
+    from analyzers.proxy import PROXY_ENABLED, ProxyUnavailable, ensure_proxy
+
+    if not content_hash or not PROXY_ENABLED:
+        yield video_path
+        return
+    budgeted = bool(options.get("time_budget_s") or options.get("frame_budget"))
+    try:
+        proxy = ensure_proxy(video_path, content_hash, options.get("max_duration_s"), stats=stats,
+                             create=not budgeted)
+    except ProxyUnavailable as e:
+        print(f"No analysis proxy, decoding the original: {e}")
+        stats["proxy"] = "unavailable"
+        proxy = None
+    if proxy is None:
+        yield video_path
+        return
+    with proxy:
+        yield proxy.name
+
+
+def _finest(values):
+    # None means "every frame" / "full resolution" and beats any number.
+    return None if any(value is None for value in values) else max(values)
+
+
+def run_multi_analysis(video_path: str, tests: list, content_hash: str = None, **options) -> dict:
+    """
+    Scores several tests from one clip with a single decode and pose pass.
+
+    `tests` holds dicts with "test_type" and optionally "athlete_height_cm",
+    "start_s" and "end_s" (the part of the clip showing that test). The
+    video is sampled at the finest rate and resolution any of the tests
+    needs. With `content_hash` the clip is decoded from its cached proxy.
+    Returns {"results": [analyzer result per test], "stats": {...}}.
+    """
+    from analyzers import registry
+
+    start = time.perf_counter()
+    stats = options["stats"] = {}
+    imported_before = registry.import_seconds
+    resolved = [_resolve_consumer(test["test_type"], test.get("athlete_height_cm")) for test in tests]
+    _import_cost(stats, imported_before)
+
+    from analyzers.engine import SegmentConsumer, mark_truncated, process_video, unreadable_result
+
+    consumers, specs = [], []
+    for test, (consumer, spec) in zip(tests, resolved):
+        if test.get("start_s") is not None or test.get("end_s") is not None:
+            consumer = SegmentConsumer(consumer, test.get("start_s"), test.get("end_s"))
+        consumers.append(consumer)
+        specs.append(spec)
+
+    options.setdefault("target_fps", _finest([spec.fps for spec in specs]))
+    options.setdefault("max_resolution", _finest([spec.max_resolution for spec in specs]))
+    with _decode_source(video_path, content_hash, stats, options) as source:
+        track = process_video(source, consumers, **options)
+    if track is None or not (len(track) or track.truncated):
+        results = [unreadable_result() for _ in tests]
+    else:
+        results = [consumer.result() for consumer in consumers]
+        if track.truncated:
+            for result in results:
+                mark_truncated(result, track)
+
+    stats["analysis_seconds"] = round(time.perf_counter() - start, 6)
+    return {"results": results, "stats": stats}
+
+
+def run_analysis(test_type: str, video_path: str, athlete_height_cm: float = None,
+                 validate_sampling: bool = False, track_path: str = None, content_hash: str = None,
+                 **options) -> dict:
+    """
+    Routes a video to the analyzer for the given test type.
+    Executed inside a worker, so it must stay a plain module-level function.
+
+    With `validate_sampling` the video is additionally analyzed at full frame
+    rate and resolution and the score drift is added to the report. With
+    `track_path` the extracted landmark track is stored for re-scoring. With
+    `content_hash` the video is decoded from its cached normalized proxy.
+    Remaining `options` are passed through to the analyzer / pose engine.
+
+    The result carries a "stats" dict with the engine's per-stage timings and
+    frame counts plus "analysis_seconds", the total time spent in the worker.
+    """
+    from analyzers import ANALYZER_VERSION, registry
+
+    start = time.perf_counter()
+    stats = options["stats"] = {}
+    imported_before = registry.import_seconds
+    analyze, args = _resolve_analyzer(test_type, athlete_height_cm)
+    _import_cost(stats, imported_before)
+
+    from analyzers.track_store import save_track
+    from analyzers.validation import validate_sampling as with_validation
+
+    if track_path:
+        metadata = {
+            "test_type": test_type,
+            "athlete_height_cm": athlete_height_cm,
+            "analyzer_version": ANALYZER_VERSION,
+        }
+
+        def store(track):
+            try:
+                save_track(track_path, track, metadata)
+            except OSError as e:
+                # Losing the track only costs a future re-score, not this result.
+                print(f"Could not store landmark track: {e}")
+
+        options["on_track"] = store
+
+    with _decode_source(video_path, content_hash, stats, options) as source:
+        if validate_sampling:
+            result = with_validation(analyze, source, *args, **options)
+        else:
+            result = analyze(source, *args, **options)
+    stats["analysis_seconds"] = round(time.perf_counter() - start, 6)
+    result["stats"] = stats
+    return result
+
+
+def rescore_track(track_path: str, test_type: str = None, athlete_height_cm: float = None) -> dict:
+    """
+    Replays a stored landmark track through the current analyzer logic.
+    Test type and athlete height default to the values recorded with the track.
+    """
+    from analyzers.track_store import load_track
+
+    track, metadata = load_track(track_path)
+    test_type = test_type or metadata.get("test_type")
+    athlete_height_cm = athlete_height_cm or metadata.get("athlete_height_cm")
+
+    analyze, args = _resolve_analyzer(test_type, athlete_height_cm)
+    return analyze(None, *args, track=track)
+
+
+class AnalysisPool:
+    """
+    Bounded pool of warm analysis workers with admission control.
+
+    Requests first reserve a slot with `acquire()`; once `workers + max_queue`
+    slots are taken further requests are rejected with `PoolSaturated`
+    instead of piling up behind the running analyses.
+    """
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS, max_queue: int = ANALYSIS_QUEUE_LIMIT,
+                 prewarm: bool = ANALYSIS_PREWARM):
+        self.workers = max(workers, 0)
+        self.max_queue = max(max_queue, 0)
+        self.prewarm = prewarm
+        self.in_flight = 0
+        self.running = 0
+        self.ready = not prewarm
+        self.cold_start = {}
+        self._executor = None
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - max(self.workers, 1))
+
+    @property
+    def busy(self) -> int:
+        # Tasks handed to the executor beyond the worker count wait inside it.
+        return min(self.running, max(self.workers, 1))
+
+    def start(self, wait: bool = True):
+        """
+        Creates the executor; with `prewarm` every worker runs the prewarm
+        phase as it starts. With `wait` the call also blocks in `warm()`.
+        """
+        if self._executor is not None:
+            return
+        initializer = _warm_worker if self.prewarm else None
+        if self.workers == 0:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=initializer)
+        else:
+            # Workers are created lazily, possibly after live sessions have
+            # started MediaPipe's threads in this process; a forked child
+            # would inherit their locks, so workers start from a fresh
+            # interpreter instead.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=initializer,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        if wait:
+            self.warm()
+
+    def warm(self):
+        """
+        Spins up every worker (running the prewarm phase when enabled), records
+        the cold-start timings in `cold_start` and marks the pool ready.
+        """
+        start = time.perf_counter()
+        if self.workers <= 1:
+            reports = [self._executor.submit(_worker_startup).result()]
+        else:
+            # The executor only starts another process when no worker is idle,
+            # so the startup tasks hold their workers until all of them run.
+            with multiprocessing.Manager() as manager:
+                barrier = manager.Barrier(self.workers)
+                futures = [self._executor.submit(_worker_startup, barrier) for _ in range(self.workers)]
+                reports = [future.result() for future in futures]
+        reports = {report["pid"]: report for report in reports}
+        self.cold_start = {
+            "workers": len(reports),
+            "seconds": round(time.perf_counter() - start, 3),
+            "max_import_seconds": max((r.get("import_seconds", 0) for r in reports.values()), default=0),
+            "max_model_seconds": max((r.get("model_seconds", 0) for r in reports.values()), default=0),
+        }
+        self.ready = True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def acquire(self):
+        """
+        Reserves a slot for one analysis, raising PoolSaturated when none is left.
+        Every successful call must be paired with `release()`.
+        """
+        if self.in_flight >= self.capacity:
+            raise PoolSaturated(f"{self.in_flight} analyses already running or queued")
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Executes `fn(*args, **kwargs)` on a worker without blocking the event loop.
+        """
+        if self._executor is None:
+            self.start(wait=False)
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        self.running += 1
+        try:
+            return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # A worker died (e.g. a native crash while decoding); replace the pool
+            # so the following requests are not all failed as well.
+            if self._executor is executor:
+                print("⚠️ Analysis worker crashed, restarting the pool.")
+                executor.shutdown(wait=False)
+                self._executor = None
+                self.start(wait=False)
+            raise
+        finally:
+            self.running -= 1